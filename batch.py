@@ -0,0 +1,180 @@
+# File: batch.py
+# Plays many solver games headless across a process pool and writes per-game
+# records plus aggregate statistics.
+#
+#   python batch.py -n 10000 --seed 1 --workers 8 --format csv -o games.csv
+#   python batch.py -n 10 --rows 1000 --cols 1000 --density 0.1 --sparse
+#   python batch.py -n 10000 --corpus boards.bin   (boards written by boards.py)
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from functools import partial
+from multiprocessing import Pool
+
+from boards import open_corpus
+from engine import MinesweeperEngine, SIZE_X, SIZE_Y, MINES
+from gamelog import GameLogWriter
+from metrics import Metrics
+
+
+EARLY_LOSS_FLAGS = 20 # losses with fewer flags than this are early losses
+LATE_LOSS_FLAGS = 80 # losses with at least this many flags are late losses
+
+FIELDS = ["seed", "won", "flags", "correctFlags", "clicked", "moves", "time", "maxMoveTime", "rulesTime", "frontierTime", "arrangementsTime", "probabilitiesTime", "nodes"]
+
+
+# Play one game with a seeded board and return its record. With a corpus
+# file, the board is board number seed of the corpus instead. With log, the
+# record gets the game log of the game as bytes in record["log"].
+def play_game(seed, sizeX=SIZE_X, sizeY=SIZE_Y, mines=MINES, density=None, sparse=False, corpus=None, log=False, componentWorkers=0, lookahead=0):
+    game = MinesweeperEngine(seed, sizeX, sizeY, mines, density, sparse)
+    game.workers = componentWorkers
+    game.lookahead = lookahead
+    if corpus is not None:
+        game.loadPosition(open_corpus(corpus).position(seed))
+    if log:
+        game.gameLog = GameLogWriter(io.BytesIO())
+    start = time.perf_counter()
+    # a move ends with every click the solver chose itself
+    last = start
+    maxMoveTime = 0.0
+    for step in game.solveSteps():
+        if step["type"] == "reveal" and step["reason"] not in ("rule", "deduction"):
+            now = time.perf_counter()
+            maxMoveTime = max(maxMoveTime, now - last)
+            last = now
+    record = {
+        "seed": seed,
+        "won": game.won,
+        "flags": game.flagCount,
+        "correctFlags": game.correctFlagCount,
+        "clicked": game.clickedCount,
+        "moves": game.moves,
+        "time": time.perf_counter() - start,
+        "maxMoveTime": maxMoveTime,
+        "rulesTime": game.metrics.seconds["rules"],
+        "frontierTime": game.metrics.seconds["frontier"],
+        "arrangementsTime": game.metrics.seconds["arrangements"],
+        "probabilitiesTime": game.metrics.seconds["probabilities"],
+        "nodes": game.metrics.counters["enumeration_nodes"],
+        "metrics": game.metrics.snapshot(),
+    }
+    if log:
+        record["log"] = game.gameLog.out.getvalue()
+    return record
+
+
+def summarise(records, wallTime):
+    games = len(records)
+    won = sum(1 for r in records if r["won"])
+    lost = [r for r in records if not r["won"]]
+    return {
+        "games": games,
+        "won": won,
+        "winRate": won / games if games else 0.0,
+        "earlyLosses": sum(1 for r in lost if r["flags"] < EARLY_LOSS_FLAGS),
+        "lateLosses": sum(1 for r in lost if r["flags"] >= LATE_LOSS_FLAGS),
+        "avgMoves": sum(r["moves"] for r in records) / games if games else 0.0,
+        "avgTime": sum(r["time"] for r in records) / games if games else 0.0,
+        "maxTime": max((r["time"] for r in records), default=0.0),
+        "maxMoveTime": max((r["maxMoveTime"] for r in records), default=0.0),
+        "wallTime": wallTime,
+        "gamesPerSecond": games / wallTime if wallTime else 0.0,
+    }
+
+
+# Play games with seeds firstSeed .. firstSeed + games - 1. Records come back
+# in seed order whatever the number of workers. With logOut, games are played
+# with a game log and the log of every game is written to logOut as soon as
+# the game is in, not kept in its record. Board options are passed on to
+# play_game.
+def run_batch(games, firstSeed=0, workers=None, chunksize=16, logOut=None, **board):
+    start = time.perf_counter()
+    seeds = range(firstSeed, firstSeed + games)
+    play = partial(play_game, log=logOut is not None, **board)
+    records = []
+
+    def collect(record):
+        if logOut is not None:
+            logOut.write(record.pop("log"))
+            logOut.flush()
+        records.append(record)
+
+    if workers == 1:
+        for seed in seeds:
+            collect(play(seed))
+    else:
+        with Pool(workers) as pool:
+            for record in pool.imap(play, seeds, chunksize):
+                collect(record)
+    return records, summarise(records, time.perf_counter() - start)
+
+
+def write_json(out, records, summary):
+    json.dump({"summary": summary, "games": records}, out, indent=1)
+    out.write("\n")
+
+
+def write_csv(out, records):
+    writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play minesweeper solver games in parallel")
+    parser.add_argument("-n", "--games", type=int, default=100, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, game i uses seed + i")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json", help="format of the per-game records")
+    parser.add_argument("-o", "--output", default=None, help="file for the records (default: stdout)")
+    parser.add_argument("--prometheus", default=None, help="file for the solver metrics of all games, in Prometheus text format")
+    parser.add_argument("--rows", type=int, default=SIZE_X, help="board rows")
+    parser.add_argument("--cols", type=int, default=SIZE_Y, help="board columns")
+    parser.add_argument("--mines", type=int, default=MINES, help="number of mines")
+    parser.add_argument("--density", type=float, default=None, help="fraction of tiles holding a mine, instead of --mines")
+    parser.add_argument("--sparse", action="store_true", help="sparse engine, for very large boards")
+    parser.add_argument("--log", default=None, help="append the game log of every game to this file (see gamelog.py)")
+    parser.add_argument("--corpus", default=None, help="play the boards of this corpus file, --seed is the first board")
+    parser.add_argument("--component-workers", type=int, default=0, help="processes counting the large frontier components of a move side by side, with --workers 1")
+    parser.add_argument("--lookahead", type=int, default=0, help="reveals a guess looks ahead (see lookahead.py), 0 to guess the lowest probability")
+    args = parser.parse_args()
+    if args.component_workers > 1 and args.workers != 1:
+        parser.error("--component-workers needs --workers 1, game workers cannot start processes of their own")
+
+    logOut = open(args.log, "ab") if args.log else None
+    try:
+        records, summary = run_batch(args.games, args.seed, args.workers, logOut=logOut, sizeX=args.rows, sizeY=args.cols,
+                                     mines=args.mines, density=args.density, sparse=args.sparse, corpus=args.corpus,
+                                     componentWorkers=args.component_workers, lookahead=args.lookahead)
+    finally:
+        if logOut is not None:
+            logOut.close()
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            write_json(out, records, summary)
+        else:
+            write_csv(out, records)
+    finally:
+        if args.output:
+            out.close()
+    if args.prometheus:
+        totals = Metrics()
+        for record in records:
+            totals.merge(record["metrics"])
+        with open(args.prometheus, "w") as f:
+            f.write(totals.prometheus())
+    # csv has no room for the aggregate, so it goes to stderr
+    if args.format == "csv":
+        json.dump(summary, sys.stderr, indent=1)
+        sys.stderr.write("\n")
+
+
+if __name__ == "__main__":
+    main()
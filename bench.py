@@ -0,0 +1,336 @@
+# File: bench.py
+# Benchmarks of the solver hot paths on a fixed corpus of boards, compared
+# against a saved baseline. The corpus stores the positions themselves (mine
+# cells, revealed and flagged cells), so every run times the same boards
+# whatever the solver or the board generator do with a seed.
+#
+# Next to the timings every benchmark records the work the solver did: search
+# nodes, counting DP states, moves and won games. The work does not depend on
+# the machine or its load, so it is what --check gates on, and any increase is
+# a regression. Timings are the median of several runs and are only reported,
+# unless --threshold says how much slower counts as a regression.
+#
+#   python bench.py                  run and compare with benchmarks/baseline.json
+#   python bench.py --check          same, exit with 1 on a regression
+#   python bench.py --check --threshold 0.5   also fail on timings 50% worse
+#   python bench.py --save-baseline  run and save the results as the new baseline
+#   python bench.py --make-corpus    rebuild benchmarks/corpus.json from seeded games
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from engine import MinesweeperEngine
+from frontier import backtrack_arrangements, find_components, component_cache
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, "benchmarks", "corpus.json")
+BASELINE = os.path.join(HERE, "benchmarks", "baseline.json")
+
+# Frontier classes of the corpus, by cells in the largest component
+SMALL_COMPONENT = 10 # small: at most this many
+MEDIUM_COMPONENT = (15, 30) # medium: in this range
+POSITIONS_PER_CLASS = 6
+PATHOLOGICAL_POSITIONS = 4 # the positions with the most search nodes
+OPENINGS = 10
+GAMES = 20
+
+MIN_TIMING = 0.02 # seconds
+
+
+def new_engine(seed=None):
+    return MinesweeperEngine(seed)
+
+
+def load(position, seed=None):
+    game = new_engine(seed)
+    game.loadPosition(position)
+    return game
+
+
+# Independent frontier components of a position, as lists of tiles
+def components(game):
+    exposedTiles = [game.tileAt(i) for i in game.board.activeCells()]
+    borderedTiles = [game.tileAt(i) for i in game.board.frontierCells()]
+    return find_components(exposedTiles, borderedTiles)
+
+
+# Search work of an engine so far: backtracking nodes and counting DP states
+def solver_work(game):
+    counters = game.metrics.counters
+    return counters.get("enumeration_nodes", 0), counters.get("dp_states", 0)
+
+
+# Search nodes and arrangements of every component of a position
+def search_size(game):
+    nodes = 0
+    leaves = [0]
+
+    def leaf(mines):
+        leaves[0] += 1
+
+    for component in components(game):
+        need, constraintCells = game.component_constraints(component)
+        nodes += backtrack_arrangements(len(component), need, constraintCells, leaf)
+    return nodes, leaves[0]
+
+
+### Corpus
+
+# Play seeded games and keep the positions the solver had to compute
+# probabilities for, sorted into small, medium and pathological frontiers.
+def make_corpus(seeds):
+    found = []
+    for seed in seeds:
+        game = new_engine(seed)
+        for step in game.solveSteps():
+            if step["type"] != "probabilities":
+                continue
+            sizes = [len(component) for component in components(game)]
+            if not sizes:
+                continue
+            nodes, _ = search_size(game)
+            found.append((max(sizes), nodes, seed, game.position()))
+
+    small = one_per_seed([f for f in found if f[0] <= SMALL_COMPONENT])[:POSITIONS_PER_CLASS]
+    medium = one_per_seed([f for f in found if MEDIUM_COMPONENT[0] <= f[0] <= MEDIUM_COMPONENT[1]])[:POSITIONS_PER_CLASS]
+    pathological = one_per_seed(sorted(found, key=lambda f: -f[1]))[:PATHOLOGICAL_POSITIONS]
+
+    openings = []
+    games = []
+    for seed in range(0, max(OPENINGS, GAMES)):
+        game = new_engine(seed)
+        mines = game.board.mineCells()
+        if seed < OPENINGS:
+            click = largest_opening(game)
+            openings.append({"sizeX": game.sizeX, "sizeY": game.sizeY, "mines": mines, "click": click})
+        if seed < GAMES:
+            games.append({"seed": seed, "sizeX": game.sizeX, "sizeY": game.sizeY, "mines": mines})
+
+    return {
+        "positions": {
+            "small": [dict(f[3], seed=f[2]) for f in small],
+            "medium": [dict(f[3], seed=f[2]) for f in medium],
+            "pathological": [dict(f[3], seed=f[2]) for f in pathological],
+        },
+        "openings": openings,
+        "games": games,
+    }
+
+
+# The cell whose click opens the largest cascade
+def largest_opening(game):
+    best = None
+    bestSize = 0
+    for i in range(0, game.sizeX * game.sizeY):
+        if game.board.isMine(i) or game.board.count(i) != 0:
+            continue
+        trial = load({"sizeX": game.sizeX, "sizeY": game.sizeY, "mines": game.board.mineCells()})
+        trial.onClick(trial.tileAt(i))
+        if trial.clickedCount > bestSize:
+            best, bestSize = i, trial.clickedCount
+    return best
+
+
+# The first position of every game, so one long game does not fill a whole class
+def one_per_seed(found):
+    seen = set()
+    kept = []
+    for f in found:
+        if f[2] not in seen:
+            seen.add(f[2])
+            kept.append(f)
+    return kept
+
+
+### Benchmarks
+
+# Median of repeat timings of fn, in seconds per call. Each timing calls fn as
+# often as needed to last at least MIN_TIMING, so short calls are not lost in
+# timer noise. fn must leave the game as it found it.
+def median_time(fn, repeat):
+    number = 1
+    while True:
+        elapsed = time_calls(fn, number)
+        if elapsed >= MIN_TIMING:
+            break
+        number *= 2
+    timings = [elapsed] + [time_calls(fn, number) for _ in range(1, repeat)]
+    return median(timings) / number
+
+
+def time_calls(fn, number):
+    start = time.perf_counter()
+    for _ in range(0, number):
+        fn()
+    return time.perf_counter() - start
+
+
+# Median of repeat timings of run(make()), for calls that change the game.
+# make() is not timed.
+def median_fresh_time(make, run, repeat):
+    timings = []
+    for _ in range(0, repeat):
+        state = make()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+    return median(timings)
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def bench_arrangements(positions, repeat):
+    seconds = 0.0
+    nodes = 0
+    arrangements = 0
+    for position in positions:
+        game = load(position)
+        parts = components(game)
+        seconds += median_time(lambda: [game.generate_arrangements(component) for component in parts], repeat)
+        n, a = search_size(game)
+        nodes += n
+        arrangements += a
+    return {"nodesPerSecond": nodes / seconds, "arrangementsPerSecond": arrangements / seconds, "nodes": nodes}
+
+
+# With an empty component cache, so every component is enumerated. The work
+# is that of the first call.
+def bench_probabilities(positions, repeat):
+    seconds = 0.0
+    nodes = states = 0
+    for position in positions:
+        game = load(position)
+        component_cache.clear()
+        game.calculateProbabilities()
+        n, s = solver_work(game)
+        nodes += n
+        states += s
+        seconds += median_time(lambda: (component_cache.clear(), game.calculateProbabilities()), repeat)
+    return {"msPerCall": seconds / len(positions) * 1000, "nodes": nodes, "states": states}
+
+
+# Rule A and Rule B are timed on the stuck positions of the corpus, where they
+# look at every exposed tile and change nothing
+def bench_rules(positions, repeat):
+    seconds = 0.0
+    for position in positions:
+        game = load(position)
+        seconds += median_time(lambda: (game.ruleA(), game.ruleB()), repeat)
+    return {"msPerCall": seconds / len(positions) * 1000}
+
+
+# Clicking a cell with no mine around it, which opens its whole zero region
+def bench_cascades(openings, repeat):
+    seconds = 0.0
+    for opening in openings:
+        seconds += median_fresh_time(lambda: load(opening), lambda game: game.onClick(game.tileAt(opening["click"])), repeat)
+    return {"msPerCascade": seconds / len(openings) * 1000}
+
+
+# Every game starts with an empty component cache
+def bench_games(games, repeat):
+    seconds = 0.0
+    moves = won = nodes = states = 0
+    for record in games:
+        played = []
+        seconds += median_fresh_time(lambda: component_cache.clear() or load(record, record["seed"]), lambda game: played.append(game.solve() or game), repeat)
+        game = played[0]
+        moves += game.moves
+        won += game.won
+        n, s = solver_work(game)
+        nodes += n
+        states += s
+    return {"msPerMove": seconds / moves * 1000, "gamesPerSecond": len(games) / seconds,
+            "moves": moves, "won": won, "nodes": nodes, "states": states}
+
+
+def run(corpus, repeat):
+    results = {}
+    for name, positions in corpus["positions"].items():
+        results["arrangements." + name] = bench_arrangements(positions, repeat)
+        results["probabilities." + name] = bench_probabilities(positions, repeat)
+    allPositions = [p for positions in corpus["positions"].values() for p in positions]
+    results["rules"] = bench_rules(allPositions, repeat)
+    results["cascades"] = bench_cascades(corpus["openings"], repeat)
+    results["games"] = bench_games(corpus["games"], repeat)
+    return results
+
+
+# Rates and won games are better higher, times and work better lower
+def higher_is_better(metric):
+    return metric.endswith("PerSecond") or metric == "won"
+
+
+def is_timing(metric):
+    return metric.endswith("PerSecond") or metric.startswith("ms")
+
+
+# Print every result next to its baseline. Returns the regressions: any
+# worse amount of work, and timings more than threshold worse unless it is None.
+def report(results, baseline, threshold=None, out=sys.stdout):
+    regressions = []
+    out.write("%-28s %-22s %14s %14s %8s\n" % ("benchmark", "metric", "value", "baseline", "change"))
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None:
+                out.write("%-28s %-22s %14.2f %14s %8s\n" % (name, metric, value, "-", ""))
+                continue
+            worse = base - value if higher_is_better(metric) else value - base
+            if is_timing(metric):
+                regressed = threshold is not None and worse > threshold * base
+            else:
+                regressed = worse > 0
+            flag = " REGRESSION" if regressed else ""
+            if regressed:
+                regressions.append((name, metric))
+            change = "%+7.1f%%" % ((value / base - 1) * 100) if base else ""
+            out.write("%-28s %-22s %14.2f %14.2f %8s%s\n" % (name, metric, value, base, change, flag))
+    return regressions
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data, indent=1):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver on a fixed corpus of boards")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of every timing, the median counts")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="relative slowdown that counts as a regression, timings are only reported without it")
+    parser.add_argument("--check", action="store_true", help="exit with 1 if any result regressed against the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--make-corpus", type=int, metavar="GAMES", default=None,
+                        help="rebuild the corpus from this many seeded games, then exit")
+    args = parser.parse_args()
+
+    if args.make_corpus is not None:
+        write_json(CORPUS, make_corpus(range(0, args.make_corpus)), indent=None)
+        return
+
+    results = run(read_json(CORPUS), args.repeat)
+    baseline = read_json(BASELINE) if os.path.exists(BASELINE) else {}
+    regressions = report(results, baseline, args.threshold)
+    if args.save_baseline:
+        write_json(BASELINE, results)
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
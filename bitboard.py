@@ -0,0 +1,480 @@
+# File: bitboard.py
+# Board representations. Cell (x, y) has index x * sizeY + y in both.
+#
+# Bitboard: every cell is one bit of a Python int, so neighbour counts are
+# popcounts of a mask and take no allocation per neighbour.
+# SparseBoard: only mines, revealed, flagged and frontier cells are stored, in
+# sets, so very large boards fit in memory and nothing costs time in
+# proportion to the board area.
+
+from functools import lru_cache
+
+import numpy as np
+
+from sweep import neighbourhood_sum, mask_to_array, array_to_mask
+
+
+LARGE_MASK = 4096 # bits of a mask beyond which bits() unpacks it with numpy
+MASK_CACHE_CELLS = 4096 # boards up to this many cells keep the neighbour mask of every cell
+
+# Indices of the neighbours of every cell, computed once per board size
+@lru_cache(maxsize=None)
+def neighbour_indices(sizeX, sizeY):
+    neighbours = []
+    for x in range(0, sizeX):
+        for y in range(0, sizeY):
+            neighbours.append(cell_neighbours(x, y, sizeX, sizeY))
+    return tuple(neighbours)
+
+
+# Neighbour masks of every cell, for boards of at most MASK_CACHE_CELLS cells.
+# They take memory in area squared, larger boards make them per call.
+@lru_cache(maxsize=8)
+def neighbour_masks(sizeX, sizeY):
+    blocks = neighbour_blocks(sizeY)
+    full = (1 << (sizeX * sizeY)) - 1
+    return tuple(block_mask(blocks, i, sizeY, full) for i in range(0, sizeX * sizeY))
+
+
+# Mask of the neighbours of cell i, its 3x3 block shifted into place
+def block_mask(blocks, i, sizeY, full):
+    y = i % sizeY
+    block = blocks[(y == 0) | (y == sizeY - 1) << 1]
+    shift = i - sizeY - 1
+    mask = block << shift if shift >= 0 else block >> -shift
+    return mask & full
+
+
+# The 3x3 blocks neighbour masks are cut from, by which edge columns the cell
+# is on: bit (dx + 1) * sizeY + dy + 1 is the neighbour (x + dx, y + dy).
+# Cells in the first or last column lose the side that would wrap round.
+@lru_cache(maxsize=None)
+def neighbour_blocks(sizeY):
+    blocks = []
+    for edges in range(0, 4):
+        block = 0
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if (dx or dy) and not (edges & 1 and dy < 0) and not (edges & 2 and dy > 0):
+                    block |= 1 << ((dx + 1) * sizeY + dy + 1)
+        blocks.append(block)
+    return tuple(blocks)
+
+
+def cell_neighbours(x, y, sizeX, sizeY):
+    cells = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if (dx or dy) and 0 <= x + dx < sizeX and 0 <= y + dy < sizeY:
+                cells.append((x + dx) * sizeY + y + dy)
+    return tuple(cells)
+
+
+# Masks of the cells not in the first and not in the last column, and of every cell
+@lru_cache(maxsize=None)
+def column_masks(sizeX, sizeY):
+    first = 0
+    for x in range(0, sizeX):
+        first |= 1 << (x * sizeY)
+    full = (1 << (sizeX * sizeY)) - 1
+    return full & ~first, full & ~(first << (sizeY - 1)), full
+
+
+# A mask grown by one cell in every direction, diagonals included
+def dilate(mask, sizeX, sizeY):
+    notFirst, notLast, full = column_masks(sizeX, sizeY)
+    rows = mask | (mask & notLast) << 1 | (mask & notFirst) >> 1
+    return (rows | rows << sizeY | rows >> sizeY) & full
+
+
+# Connected regions (diagonals included) of the True cells of a boolean
+# array, as (region id of every cell, -1 on False cells; x0, x1, y0, y1 of
+# every region). Every cell takes the smallest cell index among its
+# neighbours in the region, then the label its label has, until nothing
+# changes, so it takes a few passes over the array, not one per cell.
+def label_regions(cells):
+    sizeX, sizeY = cells.shape
+    area = sizeX * sizeY
+    label = np.where(cells, np.arange(area).reshape(sizeX, sizeY), area)
+    while True:
+        new = label.copy()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx or dy:
+                    # (x, y) takes the label of (x + dx, y + dy)
+                    to = new[max(0, -dx):sizeX - max(0, dx), max(0, -dy):sizeY - max(0, dy)]
+                    np.minimum(to, label[max(0, dx):sizeX - max(0, -dx), max(0, dy):sizeY - max(0, -dy)], out=to)
+        new[~cells] = area
+        flat = np.append(new.reshape(-1), area)
+        new = flat[flat[:-1]].reshape(sizeX, sizeY)
+        if np.array_equal(new, label):
+            break
+        label = new
+    ids, regions = np.unique(label[cells], return_inverse=True)
+    label = np.full((sizeX, sizeY), -1, dtype=np.int32)
+    label[cells] = regions
+    xs, ys = np.nonzero(cells)
+    bounds = np.zeros((len(ids), 4), dtype=np.intp)
+    bounds[:, 0] = bounds[:, 2] = area
+    np.minimum.at(bounds[:, 0], regions, xs)
+    np.maximum.at(bounds[:, 1], regions, xs + 1)
+    np.minimum.at(bounds[:, 2], regions, ys)
+    np.maximum.at(bounds[:, 3], regions, ys + 1)
+    return label, bounds
+
+
+def popcount(mask):
+    return mask.bit_count()
+
+
+# Indices of the set bits of a mask, lowest first. Clearing the lowest bit
+# copies the whole int, so masks of large boards are unpacked by numpy instead.
+def bits(mask):
+    if mask.bit_length() > LARGE_MASK:
+        raw = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+        yield from np.flatnonzero(np.unpackbits(raw, bitorder="little")).tolist()
+        return
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Bitboard:
+
+    def __init__(self, sizeX, sizeY):
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.full = (1 << (sizeX * sizeY)) - 1
+        self.neighbourIndices = neighbour_indices(sizeX, sizeY)
+        self.blocks = neighbour_blocks(sizeY)
+        self.neighbourMasks = neighbour_masks(sizeX, sizeY) if sizeX * sizeY <= MASK_CACHE_CELLS else None
+
+        self.mines = 0
+        self.numbers = 0 # cells with at least one mine around them
+        self.counts = bytearray(sizeX * sizeY)
+        self.revealed = 0
+        self.flagged = 0
+        # Kept up to date by reveal, flag and unflag so the solver never scans the board
+        self.exposed = 0 # revealed cells with a number
+        self.frontier = 0 # covered, unflagged cells next to a revealed cell
+        self.unbordered = sizeX * sizeY # covered, unflagged cells not on the frontier
+        self.regions = None # region id of every cell, see computeRegions
+        self.regionBounds = None
+
+    def index(self, x, y):
+        return x * self.sizeY + y
+
+    def neighbours(self, i):
+        return self.neighbourIndices[i]
+
+    # Mask of the neighbours of a cell, kept for small boards only
+    def neighbourMask(self, i):
+        if self.neighbourMasks is not None:
+            return self.neighbourMasks[i]
+        return block_mask(self.blocks, i, self.sizeY, self.full)
+
+    def placeMine(self, i):
+        self.mines |= 1 << i
+
+    # Fill in the number of every cell once all mines are placed, with one
+    # neighbourhood sum over the whole board
+    def computeCounts(self):
+        counts = neighbourhood_sum(mask_to_array(self.mines, self.sizeX, self.sizeY)).astype(np.uint8)
+        self.counts = bytearray(counts.tobytes())
+        self.numbers = array_to_mask(counts > 0)
+        self.computeRegions()
+
+    # Label the connected regions of cells with no mine around them: the
+    # region id of every cell (-1 off the regions) and the bounds x0, x1, y0, y1
+    # of every region. openRegion makes the masks of a region when it opens.
+    def computeRegions(self):
+        zeros = mask_to_array(self.full & ~(self.mines | self.numbers), self.sizeX, self.sizeY)
+        self.regions, self.regionBounds = label_regions(zeros)
+
+    # A number read off a board whose mines are not known. Its regions are
+    # not known either then.
+    def setCount(self, i, count):
+        self.counts[i] = count
+        if count:
+            self.numbers |= 1 << i
+        else:
+            self.numbers &= ~(1 << i)
+        self.regions = None
+
+    def isMine(self, i):
+        return bool(self.mines >> i & 1)
+
+    def count(self, i):
+        return self.counts[i]
+
+    def isRevealed(self, i):
+        return bool(self.revealed >> i & 1)
+
+    def isFlagged(self, i):
+        return bool(self.flagged >> i & 1)
+
+    def isExposed(self, i):
+        return bool(self.exposed >> i & 1)
+
+    def isFrontier(self, i):
+        return bool(self.frontier >> i & 1)
+
+    def covered(self):
+        return self.full & ~(self.revealed | self.flagged)
+
+    def coveredCells(self):
+        return bits(self.covered())
+
+    def exposedCells(self):
+        return list(bits(self.exposed))
+
+    def mineCells(self):
+        return list(bits(self.mines))
+
+    def revealedCells(self):
+        return list(bits(self.revealed))
+
+    def flaggedCells(self):
+        return list(bits(self.flagged))
+
+    def frontierCells(self):
+        return list(bits(self.frontier))
+
+    # Covered, unflagged cells that are not on the frontier
+    def unborderedCells(self):
+        return bits(self.covered() & ~self.frontier)
+
+    # Exposed cells next to the frontier, the only ones that still constrain anything
+    def activeCells(self):
+        around = 0
+        for i in bits(self.frontier):
+            around |= self.neighbourMask(i)
+        return list(bits(around & self.exposed))
+
+    # Covered, unflagged neighbours of a cell
+    def unknownAround(self, i):
+        return self.neighbourMask(i) & ~(self.revealed | self.flagged)
+
+    def unknownNeighbours(self, i):
+        return list(bits(self.unknownAround(i)))
+
+    def unknownCount(self, i):
+        return popcount(self.neighbourMask(i) & ~(self.revealed | self.flagged))
+
+    def flaggedCount(self, i):
+        return popcount(self.neighbourMask(i) & self.flagged)
+
+    def revealedCount(self, i):
+        return popcount(self.neighbourMask(i) & self.revealed)
+
+    def reveal(self, i):
+        bit = 1 << i
+        if self.revealed & bit:
+            return
+        if not (self.frontier | self.flagged) & bit:
+            self.unbordered -= 1
+        self.revealed |= bit
+        if self.counts[i]:
+            self.exposed |= bit
+        added = self.neighbourMask(i) & ~(self.revealed | self.flagged | self.frontier)
+        self.unbordered -= popcount(added)
+        self.frontier = (self.frontier | added) & ~bit
+
+    # Reveal what a cascade from zero cell i (revealed already) reveals, all at
+    # once: the covered, unflagged cells of its region and rim. Returns the
+    # mask of those cells and the mask of the frontier cells around them, or
+    # None when a flag or a revealed cell inside the region would stop the
+    # cascade short, or when the regions are not known.
+    def openRegion(self, i):
+        if self.regions is None:
+            return None
+        region = self.regions.flat[i]
+        x0, x1, y0, y1 = self.regionBounds[region]
+        cells = np.zeros((self.sizeX, self.sizeY), dtype=bool)
+        cells[x0:x1, y0:y1] = self.regions[x0:x1, y0:y1] == region
+        zeros = array_to_mask(cells)
+        if zeros & ~(1 << i) & (self.revealed | self.flagged):
+            return None
+        cells = dilate(zeros, self.sizeX, self.sizeY) & ~(self.revealed | self.flagged)
+        self.unbordered -= popcount(cells & ~self.frontier)
+        self.revealed |= cells
+        self.exposed |= cells & self.numbers
+        # flags on the rim stay covered, so only what was revealed borders anything
+        around = dilate(cells | 1 << i, self.sizeX, self.sizeY) & ~(self.revealed | self.flagged)
+        added = around & ~self.frontier
+        self.unbordered -= popcount(added)
+        self.frontier = (self.frontier | added) & ~self.revealed
+        return cells, around & self.frontier
+
+    def flag(self, i):
+        bit = 1 << i
+        if self.flagged & bit:
+            return
+        if self.frontier & bit:
+            self.frontier &= ~bit
+        else:
+            self.unbordered -= 1
+        self.flagged |= bit
+
+    def unflag(self, i):
+        bit = 1 << i
+        if not self.flagged & bit:
+            return
+        self.flagged &= ~bit
+        if self.neighbourMask(i) & self.revealed:
+            self.frontier |= bit
+        else:
+            self.unbordered += 1
+
+
+# Same interface as Bitboard, but sets of cell indices instead of masks and
+# numbers worked out when first asked for. Memory and time per call depend
+# on the number of mines and of revealed/frontier cells, not on the area.
+class SparseBoard:
+
+    def __init__(self, sizeX, sizeY):
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+
+        self.mines = set()
+        self.counts = {} # numbers worked out so far
+        self.revealed = set()
+        self.flagged = set()
+        self.exposed = set() # revealed cells with a number
+        self.frontier = set() # covered, unflagged cells next to a revealed cell
+        self.unbordered = sizeX * sizeY # covered, unflagged cells not on the frontier
+
+    def index(self, x, y):
+        return x * self.sizeY + y
+
+    def neighbours(self, i):
+        return cell_neighbours(i // self.sizeY, i % self.sizeY, self.sizeX, self.sizeY)
+
+    def placeMine(self, i):
+        self.mines.add(i)
+
+    # Numbers are worked out lazily by count()
+    def computeCounts(self):
+        self.counts = {}
+
+    def setCount(self, i, count):
+        self.counts[i] = count
+
+    # Zero regions are not labelled on sparse boards, cascades go cell by cell
+    def openRegion(self, i):
+        return None
+
+    def isMine(self, i):
+        return i in self.mines
+
+    def count(self, i):
+        count = self.counts.get(i)
+        if count is None:
+            count = 0
+            for j in self.neighbours(i):
+                if j in self.mines:
+                    count += 1
+            self.counts[i] = count
+        return count
+
+    def isRevealed(self, i):
+        return i in self.revealed
+
+    def isFlagged(self, i):
+        return i in self.flagged
+
+    def isExposed(self, i):
+        return i in self.exposed
+
+    def isFrontier(self, i):
+        return i in self.frontier
+
+    # Walks the whole board, only meant as a last resort
+    def coveredCells(self):
+        for i in range(0, self.sizeX * self.sizeY):
+            if i not in self.revealed and i not in self.flagged:
+                yield i
+
+    def exposedCells(self):
+        return sorted(self.exposed)
+
+    def mineCells(self):
+        return sorted(self.mines)
+
+    def revealedCells(self):
+        return sorted(self.revealed)
+
+    def flaggedCells(self):
+        return sorted(self.flagged)
+
+    def frontierCells(self):
+        return sorted(self.frontier)
+
+    # Walks the whole board, only meant as a last resort
+    def unborderedCells(self):
+        for i in self.coveredCells():
+            if i not in self.frontier:
+                yield i
+
+    # Exposed cells next to the frontier, the only ones that still constrain anything
+    def activeCells(self):
+        active = set()
+        for i in self.frontier:
+            for j in self.neighbours(i):
+                if j in self.exposed:
+                    active.add(j)
+        return sorted(active)
+
+    def unknownNeighbours(self, i):
+        return [j for j in self.neighbours(i) if j not in self.revealed and j not in self.flagged]
+
+    def unknownCount(self, i):
+        return len(self.unknownNeighbours(i))
+
+    def flaggedCount(self, i):
+        count = 0
+        for j in self.neighbours(i):
+            if j in self.flagged:
+                count += 1
+        return count
+
+    def revealedCount(self, i):
+        count = 0
+        for j in self.neighbours(i):
+            if j in self.revealed:
+                count += 1
+        return count
+
+    def reveal(self, i):
+        if i in self.revealed:
+            return
+        if i in self.frontier:
+            self.frontier.discard(i)
+        elif i not in self.flagged:
+            self.unbordered -= 1
+        self.revealed.add(i)
+        if self.count(i):
+            self.exposed.add(i)
+        for j in self.neighbours(i):
+            if j not in self.revealed and j not in self.flagged and j not in self.frontier:
+                self.frontier.add(j)
+                self.unbordered -= 1
+
+    def flag(self, i):
+        if i in self.flagged:
+            return
+        if i in self.frontier:
+            self.frontier.discard(i)
+        else:
+            self.unbordered -= 1
+        self.flagged.add(i)
+
+    def unflag(self, i):
+        if i not in self.flagged:
+            return
+        self.flagged.discard(i)
+        if any(j in self.revealed for j in self.neighbours(i)):
+            self.frontier.add(i)
+        else:
+            self.unbordered += 1
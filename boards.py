@@ -0,0 +1,142 @@
+# File: boards.py
+# Seeded board generation and a packed on-disk corpus of boards.
+#
+# Boards are generated a chunk at a time: one generator seeded with
+# (seed, chunk) draws a random key for every cell of every board of the chunk,
+# and the cells with the smallest keys hold the mines. That is sampling without
+# replacement for all boards of the chunk in one vectorised step. Board k of a
+# seed only depends on (seed, k, board size), whatever the number of boards
+# generated with it. Chunks are CHUNK boards, fewer on large boards so the keys
+# of a chunk stay within KEYS_LIMIT bytes.
+#
+# A corpus file is a fixed header followed by one row per board with a bit per
+# cell, set for mines (row-major, lowest bit first). An expert board takes 60
+# bytes, so millions of them fit in a file that is memory-mapped, not read.
+#
+#   python boards.py -o boards.bin -n 1000000 --seed 1
+#   python boards.py -o huge.bin -n 100 --rows 200 --cols 200 --density 0.15
+
+import argparse
+import struct
+from functools import lru_cache
+
+import numpy as np
+
+from engine import SIZE_X, SIZE_Y, MINES
+from sweep import neighbourhood_sum
+
+
+CHUNK = 4096 # boards generated together
+KEYS_LIMIT = 1 << 26 # bytes of random keys drawn for one chunk
+MAGIC = b"MSBC"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHIqQ") # magic, version, sizeX, sizeY, mines, seed, count
+
+
+# Boards per chunk on boards of area cells
+def chunk_size(area):
+    return max(1, min(CHUNK, KEYS_LIMIT // (8 * area)))
+
+
+# Mine masks, shape (count, sizeX, sizeY), of boards first .. first + count - 1 of a seed
+def generate_masks(seed, first, count, sizeX, sizeY, mines):
+    area = sizeX * sizeY
+    size = chunk_size(area)
+    masks = np.zeros((count, area), dtype=bool)
+    done = 0
+    while done < count:
+        k = first + done
+        chunk, offset = divmod(k, size)
+        rows = min(count - done, size - offset)
+        keys = np.random.default_rng([seed, chunk]).random((offset + rows, area))[offset:]
+        cells = np.argpartition(keys, mines - 1, axis=1)[:, :mines] if mines else np.empty((rows, 0), dtype=np.intp)
+        np.put_along_axis(masks[done:done + rows], cells, True, axis=1)
+        done += rows
+    return masks.reshape(count, sizeX, sizeY)
+
+
+# Number of every cell of one or more boards, in one pass
+def neighbour_counts(masks):
+    return neighbourhood_sum(masks).astype(np.uint8)
+
+
+def mines_for(sizeX, sizeY, mines=None, density=None):
+    if density is not None:
+        mines = round(density * sizeX * sizeY)
+    if mines is None:
+        mines = MINES
+    if mines < 0 or mines >= sizeX * sizeY:
+        raise ValueError("a %dx%d board cannot hold %d mines" % (sizeX, sizeY, mines))
+    return mines
+
+
+### Corpus files
+
+def row_bytes(sizeX, sizeY):
+    return (sizeX * sizeY + 7) // 8
+
+
+# Generate count boards of a seed into a corpus file, a chunk at a time
+def write_corpus(path, seed, count, sizeX=SIZE_X, sizeY=SIZE_Y, mines=MINES):
+    size = chunk_size(sizeX * sizeY)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, sizeX, sizeY, mines, seed, count))
+        for first in range(0, count, size):
+            masks = generate_masks(seed, first, min(size, count - first), sizeX, sizeY, mines)
+            f.write(np.packbits(masks.reshape(len(masks), -1), axis=1, bitorder="little").tobytes())
+
+
+class BoardCorpus:
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, sizeX, sizeY, mines, seed, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a version %d board corpus" % (path, VERSION))
+        self.path = path
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.mines = mines
+        self.seed = seed
+        self.rows = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size, shape=(count, row_bytes(sizeX, sizeY)))
+
+    def __len__(self):
+        return len(self.rows)
+
+    # Mine masks of boards start .. stop - 1, shape (stop - start, sizeX, sizeY)
+    def masks(self, start, stop):
+        bits = np.unpackbits(self.rows[start:stop], axis=1, count=self.sizeX * self.sizeY, bitorder="little")
+        return bits.reshape(-1, self.sizeX, self.sizeY).astype(bool)
+
+    def mineCells(self, k):
+        return np.flatnonzero(self.masks(k, k + 1)[0]).tolist()
+
+    def counts(self, k):
+        return neighbour_counts(self.masks(k, k + 1)[0])
+
+    # Board k as a position for MinesweeperEngine.loadPosition
+    def position(self, k):
+        return {"sizeX": self.sizeX, "sizeY": self.sizeY, "mines": self.mineCells(k)}
+
+
+# Corpora stay open for the life of the process, so games can look boards up by path
+@lru_cache(maxsize=8)
+def open_corpus(path):
+    return BoardCorpus(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a corpus of seeded minesweeper boards")
+    parser.add_argument("-o", "--output", required=True, help="corpus file to write")
+    parser.add_argument("-n", "--boards", type=int, default=1000, help="number of boards")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus")
+    parser.add_argument("--rows", type=int, default=SIZE_X, help="board rows")
+    parser.add_argument("--cols", type=int, default=SIZE_Y, help="board columns")
+    parser.add_argument("--mines", type=int, default=None, help="number of mines (default: %d)" % MINES)
+    parser.add_argument("--density", type=float, default=None, help="fraction of tiles holding a mine, instead of --mines")
+    args = parser.parse_args()
+    write_corpus(args.output, args.seed, args.boards, args.rows, args.cols, mines_for(args.rows, args.cols, args.mines, args.density))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# File: deduction.py
+# Deductions from the number tiles alone, run when Rules A and B are stuck and
+# before any arrangement is enumerated. Every number tile next to the frontier
+# gives one linear constraint
+#   sum of its covered, unflagged neighbours = its number - flags around it
+# and every cell these constraints settle is one cell less to enumerate.
+#
+# Constraints are (cells, mines) pairs, cells a frozenset of board indices.
+
+from math import gcd
+
+
+# Cells that are certainly mines and certainly safe, as sorted lists
+def deduce(constraints):
+    constraints = list(set(constraints))
+    mines = set()
+    safe = set()
+
+    for cells, n in constraints + pair_constraints(constraints, mines, safe):
+        if n == 0:
+            safe.update(cells)
+        elif n == len(cells):
+            mines.update(cells)
+
+    for group in split_constraints(constraints):
+        rows, columns = eliminate(group)
+        for row in rows:
+            bound_row(row, columns, mines, safe)
+
+    return sorted(mines), sorted(safe - mines)
+
+
+# Subset and difference reasoning between every two constraints sharing a cell.
+# A inside B leaves B - A with the difference of their mines. Overlapping A and
+# B settle both differences when B - A has to be all mines for B to reach its
+# number (the 1-2 pattern). Returns the new constraints, settled cells go
+# straight into mines and safe.
+def pair_constraints(constraints, mines, safe):
+    byCell = {}
+    for c, (cells, _) in enumerate(constraints):
+        for i in cells:
+            byCell.setdefault(i, []).append(c)
+
+    derived = []
+    for a, (cellsA, nA) in enumerate(constraints):
+        others = set()
+        for i in cellsA:
+            others.update(byCell[i])
+        for b in others:
+            if b == a:
+                continue
+            cellsB, nB = constraints[b]
+            onlyB = cellsB - cellsA
+            if not onlyB:
+                continue
+            if cellsA < cellsB:
+                derived.append((onlyB, nB - nA))
+            elif nB - len(onlyB) == nA:
+                mines.update(onlyB)
+                safe.update(cellsA - cellsB)
+    return derived
+
+
+# Groups of constraints that share no cell, each can be eliminated on its own
+def split_constraints(constraints):
+    parent = list(range(len(constraints)))
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    owner = {}
+    for c, (cells, _) in enumerate(constraints):
+        for i in cells:
+            if i in owner:
+                parent[find(c)] = find(owner[i])
+            else:
+                owner[i] = c
+
+    groups = {}
+    for c, constraint in enumerate(constraints):
+        groups.setdefault(find(c), []).append(constraint)
+    return list(groups.values())
+
+
+# Gaussian elimination over the integers, every row kept divided by the gcd of
+# its entries. Returns the reduced rows, each a list of coefficients followed by
+# the mine count, and the cells of the columns.
+def eliminate(constraints):
+    columns = sorted(set().union(*(cells for cells, _ in constraints)))
+    column = {i: k for k, i in enumerate(columns)}
+    rows = []
+    for cells, n in constraints:
+        row = [0] * (len(columns) + 1)
+        for i in cells:
+            row[column[i]] = 1
+        row[-1] = n
+        rows.append(row)
+
+    pivot = 0
+    for k in range(0, len(columns)):
+        r = next((r for r in range(pivot, len(rows)) if rows[r][k]), None)
+        if r is None:
+            continue
+        rows[pivot], rows[r] = rows[r], rows[pivot]
+        top = rows[pivot]
+        for r in range(0, len(rows)):
+            f = rows[r][k]
+            if r != pivot and f:
+                rows[r] = reduce_row([top[k] * x - f * y for x, y in zip(rows[r], top)])
+        pivot += 1
+        if pivot == len(rows):
+            break
+    return rows, columns
+
+
+def reduce_row(row):
+    d = 0
+    for x in row:
+        d = gcd(d, x)
+    return [x // d for x in row] if d > 1 else row
+
+
+# Every cell is 0 or 1, so a row can only reach its mine count with all positive
+# cells mines and all negative ones safe when the count is the largest value
+# the row can take, and the other way round when it is the smallest.
+def bound_row(row, columns, mines, safe):
+    n = row[-1]
+    high = sum(x for x in row[:-1] if x > 0)
+    low = sum(x for x in row[:-1] if x < 0)
+    if high == low or (n != high and n != low):
+        return
+    for k, x in enumerate(row[:-1]):
+        if x == 0:
+            continue
+        if (x > 0) == (n == high):
+            mines.add(columns[k])
+        else:
+            safe.add(columns[k])
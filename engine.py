@@ -0,0 +1,766 @@
+# File: engine.py
+# Headless board/game engine and solver. Nothing in here touches Tkinter,
+# the window in minesweeper.py is a thin view on top of this class.
+
+from collections import deque
+import random
+from datetime import datetime
+import time
+from fractions import Fraction
+
+from bitboard import Bitboard, SparseBoard, bits
+from sweep import forced_cells, forced_cells_sparse
+from deduction import deduce
+from metrics import Metrics, json_line
+from frontier import find_components, enumerate_arrangements, solve_components, component_pool, combine_components, predicted_states, DP_MIN_CELLS, PARALLEL_MIN_STATES
+from sampling import ComponentSampler, sample_until, interval, BATCHES, EXACT_LIMIT, SAMPLE_BUDGET
+from lookahead import choose_move, BUDGET as LOOKAHEAD_BUDGET
+
+
+# Expert board, the default geometry
+SIZE_X = 16  #Rows
+SIZE_Y = 30  #Columns
+MINES = 99
+
+STATE_DEFAULT = 0
+STATE_CLICKED = 1
+STATE_FLAGGED = 2
+
+
+class MinesweeperEngine:
+
+    # A seed makes the mine placement and the solver's random choices
+    # reproducible, restarting a seeded engine replays the same board.
+    # The number of mines is given either as a count or as a density.
+    # A sparse engine only stores revealed and frontier tiles (see SparseBoard),
+    # for boards far too large to keep a tile for every cell.
+    def __init__(self, seed=None, sizeX=SIZE_X, sizeY=SIZE_Y, mines=MINES, density=None, sparse=False):
+        if density is not None:
+            mines = round(density * sizeX * sizeY)
+        if mines < 0 or mines >= sizeX * sizeY:
+            raise ValueError("a %dx%d board cannot hold %d mines" % (sizeX, sizeY, mines))
+        self.seed = seed
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.mineTotal = mines
+        self.sparse = sparse
+        self.layout = None # mine cells of a loaded position, see loadPosition
+        self.verbose = False # print solver progress
+        self.metricsLog = None # file that gets a JSON line of metrics after every move
+        self.gameLog = None # GameLogWriter that records every game the solver plays (see gamelog.py)
+        self.exactLimit = EXACT_LIMIT
+        self.moveBudget = SAMPLE_BUDGET
+        self.workers = 0 # processes counting large frontier components side by side, 0 or 1 for none
+        self.parallelMin = PARALLEL_MIN_STATES # predicted DP states of a component worth another process
+        self.lookahead = 0 # reveals a guess looks ahead (see lookahead.py), 0 to guess the lowest probability
+        self.lookaheadBudget = LOOKAHEAD_BUDGET # seconds a guess may search
+        self.restart()
+
+    def setup(self):
+        # create flag and clicked tile variables
+        self.flagCount = 0
+        self.correctFlagCount = 0
+        self.clickedCount = 0
+        self.startTime = None
+        # For solver
+        self.first_click = True
+        self.cascaded = False
+        # Game result, set by gameOver
+        self.finished = False
+        self.won = False
+        self.explodedTile = None
+        # Solver statistics
+        self.moves = 0
+        self.combs = 0 # total weight of the last probability calculation
+        self.metrics = Metrics() # counters and phase timers, see metrics.py
+        self.random = random.Random(self.seed)
+        self.logStarted = False # whether the game log has this game yet
+
+        # create the board
+        self.board = SparseBoard(self.sizeX, self.sizeY) if self.sparse else Bitboard(self.sizeX, self.sizeY)
+        self.tileMap = {} # tiles by board index
+        self.mines = self.mineTotal
+        self.hundredCount = 0
+        self.unborderedProbability = -1
+        self.unborderedWeight = 0 # weight of every unbordered tile in the last probability calculation
+        self.approximate = False # whether the last probabilities were sampled
+        self.unborderedError = 0.0
+
+        # Populate the board with mines, the ones of a loaded position if there is one
+        if self.layout is not None:
+            for i in self.layout:
+                self.board.placeMine(i)
+        for _ in range(0, self.mines if self.layout is None else 0):
+            x = self.random.randint(0, self.sizeX-1)
+            y = self.random.randint(0, self.sizeY-1)
+            while self.board.isMine(self.board.index(x, y)):
+                x = self.random.randint(0, self.sizeX-1)
+                y = self.random.randint(0, self.sizeY-1)
+            self.board.placeMine(self.board.index(x, y))
+
+        # find nearby mines
+        self.board.computeCounts()
+
+        # A sparse board creates its tiles when they are first looked at. A dense
+        # one creates them all up front, with the neighbour lists of every tile
+        # so getNeighbors never builds one.
+        self.tiles = dict({})
+        if not self.sparse:
+            for x in range(0, self.sizeX):
+                self.tiles[x] = {}
+                for y in range(0, self.sizeY):
+                    self.tiles[x][y] = self.tileAt(self.board.index(x, y))
+            self.neighbours = [[self.tileMap[j] for j in self.board.neighbours(i)] for i in range(0, self.sizeX * self.sizeY)]
+
+    # The tile at a board index
+    def tileAt(self, i):
+        tile = self.tileMap.get(i)
+        if tile is None:
+            x, y = divmod(i, self.sizeY)
+            # Definition of a tile
+            tile = {
+                "id": str(x) + "_" + str(y),
+                "index": i,
+                "isMine": self.board.isMine(i),
+                "state": STATE_DEFAULT,
+                "coords": {
+                    "x": x,
+                    "y": y,
+                },
+                "mines": self.board.count(i),
+                "probability": -1, # calculated when solving
+                "isBorder": self.board.isFrontier(i), # calculated when solving
+                "solver_mine": False, # calculated when solving
+                "solver_safe": False, # calculated when solving
+                "nr_present_in_arrangement": 0, # calculated when solving
+                "combs": 0, # calculated when solving, I have no idea what to call this
+                "error": 0.0, # half width of the 95% interval of probability, when it was sampled
+            }
+            self.tileMap[i] = tile
+        return tile
+
+    def restart(self):
+        self.setup()
+        self.updateLabels()
+
+    # The current position as plain lists of cell indices, enough for
+    # loadPosition to set the same board up again
+    def position(self):
+        return {
+            "sizeX": self.sizeX,
+            "sizeY": self.sizeY,
+            "mines": self.board.mineCells(),
+            "revealed": self.board.revealedCells(),
+            "flagged": self.board.flaggedCells(),
+        }
+
+    # Set up a position saved by position(). Revealed cells are uncovered one
+    # by one without cascading, so the board ends up exactly as it was saved.
+    # Restarting afterwards replays the same mines with nothing revealed.
+    def loadPosition(self, position):
+        self.sizeX = position["sizeX"]
+        self.sizeY = position["sizeY"]
+        self.mineTotal = len(position["mines"])
+        self.layout = list(position["mines"])
+        self.restart()
+        self.uncover(position.get("revealed", []), position.get("flagged", []))
+
+    # Set up a board only known from the outside: the numbers of its revealed
+    # cells (cell index -> number) and its flags, not where its mines are.
+    # Such a board is for working probabilities out, not for playing on.
+    def loadObserved(self, sizeX, sizeY, mines, numbers, flagged=()):
+        if mines < 0 or mines >= sizeX * sizeY:
+            raise ValueError("a %dx%d board cannot hold %d mines" % (sizeX, sizeY, mines))
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.mineTotal = mines
+        self.layout = []
+        self.restart()
+        for i, count in numbers.items():
+            self.board.setCount(i, count)
+            self.tileAt(i)["mines"] = count
+        self.uncover(list(numbers), flagged)
+
+    # Reveal cells one by one without cascading, then flag cells
+    def uncover(self, revealed, flagged):
+        queue = deque()
+        for i in revealed:
+            self.clearTile(self.tileAt(i), queue)
+        for i in flagged:
+            self.flagTile(self.tileAt(i))
+        for tile in self.tileMap.values():
+            tile["isBorder"] = self.board.isFrontier(tile["index"])
+        if revealed:
+            self.first_click = False
+
+    ### View hooks. The engine calls these whenever something a view would
+    ### show changes, they do nothing when running headless.
+
+    def updateLabels(self):
+        pass
+
+    def updateTile(self, tile):
+        pass
+
+    # Called once per solver move, so a view can redraw while the solver plays
+    def refresh(self):
+        pass
+
+    def gameOver(self, won):
+        self.finished = True
+        self.won = won
+
+    ### Board
+
+    def getNeighbors(self, x, y):
+        return self.neighbourTiles(x * self.sizeY + y)
+
+    def neighbourTiles(self, i):
+        if self.sparse:
+            return [self.tileAt(j) for j in self.board.neighbours(i)]
+        return self.neighbours[i]
+
+    def onClick(self, tile):
+        if self.startTime == None:
+            self.startTime = datetime.now()
+
+        if tile["isMine"] == True:
+            # end game
+            self.explodedTile = tile
+            self.gameOver(False)
+            return False
+        self.board.reveal(tile["index"])
+
+        # Case: no mines around
+        if tile["mines"] == 0:
+            self.cascaded = True
+            self.first_click = False
+            tile["solver_mine"] = False
+            tile["solver_safe"] = False
+            self.clearSurroundingTiles(tile["index"])
+
+        # Case: mines around
+        else:
+            self.first_click = False
+            tile["solver_mine"] = False
+            tile["solver_safe"] = False
+            neighbours = self.getNeighbors(tile["coords"]["x"], tile["coords"]["y"])
+            for neighbour in neighbours:
+                if neighbour["state"] == STATE_DEFAULT:
+                    neighbour["isBorder"] = True
+
+        # if not already set as clicked, change state and count
+        if tile["state"] != STATE_CLICKED:
+            tile["state"] = STATE_CLICKED
+            self.clickedCount += 1
+            tile["isBorder"] = False
+        self.updateTile(tile)
+        if self.clickedCount == (self.sizeX * self.sizeY) - self.mines:
+            self.gameOver(True)
+            return False
+        return True
+
+    def onRightClick(self, tile):
+        if self.startTime == None:
+            self.startTime = datetime.now()
+
+        # if not clicked
+        if tile["state"] == STATE_DEFAULT:
+            self.flagTile(tile)
+        # if flagged, unflag
+        elif tile["state"] == STATE_FLAGGED:
+            tile["state"] = STATE_DEFAULT
+            self.board.unflag(tile["index"])
+            tile["isBorder"] = self.board.isFrontier(tile["index"])
+            tile["probability"] = -1
+            self.hundredCount -= 1
+            # if a mine
+            if tile["isMine"] == True:
+                self.correctFlagCount -= 1
+            self.flagCount -= 1
+            self.updateTile(tile)
+            self.updateLabels()
+
+    def flagTile(self, tile):
+        tile["probability"] = 100
+        self.hundredCount += 1
+        tile["state"] = STATE_FLAGGED
+        self.board.flag(tile["index"])
+        # if a mine
+        if tile["isMine"] == True:
+            self.correctFlagCount += 1
+        self.flagCount += 1
+        self.updateTile(tile)
+        self.updateLabels()
+
+    # Everything a click on zero cell i cascades to. Dense boards labelled
+    # their zero regions when the mines were placed, so the region opens in one
+    # step; otherwise it is a breadth-first search from cell to cell.
+    def clearSurroundingTiles(self, i):
+        opened = self.board.openRegion(i)
+        if opened is not None:
+            cells, bordered = opened
+            for j in bits(cells):
+                tile = self.tileMap[j]
+                tile["solver_mine"] = False
+                tile["solver_safe"] = False
+                tile["state"] = STATE_CLICKED
+                self.clickedCount += 1
+                self.updateTile(tile)
+            for j in bits(bordered):
+                self.tileMap[j]["isBorder"] = True
+            return
+
+        queue = deque([i])
+        while len(queue) != 0:
+            for tile in self.neighbourTiles(queue.popleft()):
+                self.clearTile(tile, queue)
+
+    def clearTile(self, tile, queue):
+        if tile["state"] != STATE_DEFAULT:
+            return
+
+        tile["solver_mine"] = False
+        tile["solver_safe"] = False
+        if tile["mines"] == 0:
+            queue.append(tile["index"])
+
+        tile["state"] = STATE_CLICKED
+        self.board.reveal(tile["index"])
+        # Set neighbours as border tiles
+        for neighbour in self.neighbourTiles(tile["index"]):
+            if neighbour["state"] == STATE_DEFAULT:
+                neighbour["isBorder"] = True
+        self.clickedCount += 1
+        self.updateTile(tile)
+
+    ### Solver
+
+    # Play until the game is over
+    def solve(self):
+        for _ in self.solveSteps():
+            pass
+
+    # The solver as a generator. Every decision is yielded as soon as it is made:
+    #   {"type": "reveal", "tile": tile, "reason": "first click" | "rule" | "deduction" | "guess"}
+    #   {"type": "flag", "tile": tile, "reason": "rule" | "deduction" | "certain"}
+    #   {"type": "probabilities", "tiles": borderedTiles, "unbordered": probability}
+    #   {"type": "gameover", "won": won}
+    # so callers can step it, time each move or stop it whenever they like.
+    def solveSteps(self):
+        if self.gameLog is not None and not self.logStarted:
+            self.gameLog.startGame(self)
+            self.logStarted = True
+        while not self.finished:
+            moved = yield from self.loggedSteps(self.moveSteps())
+            if self.metricsLog is not None:
+                self.metricsLog.write(json_line(self.metrics.lap(), move=self.moves))
+            if not moved:
+                break # nothing left to click
+        if self.finished:
+            yield from self.loggedSteps(iter([{"type": "gameover", "won": self.won}]))
+
+    # Pass the events of steps on, writing them to the game log first.
+    # Returns what steps returns.
+    def loggedSteps(self, steps):
+        if self.gameLog is None:
+            return (yield from steps)
+        while True:
+            try:
+                event = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            self.gameLog.event(self, event)
+            yield event
+
+    # One move of the solver: the rules until they are stuck, then a guess on
+    # the tile with the lowest probability. Returns False if no move was possible.
+    def moveSteps(self):
+        # First click is on a random corner.
+        # This has the highest chance of resulting in a cascade.
+        # As the corner is the place that minimizes the number of adjacent tiles.
+        if self.first_click:
+            corners = [(0, 0), (0, self.sizeY-1), (self.sizeX-1, 0), (self.sizeX-1, self.sizeY-1)]
+            self.random.shuffle(corners)
+            for x,y in corners:
+                tile = self.tileAt(self.board.index(x, y))
+                if tile["state"] == STATE_DEFAULT:
+                    self.moves += 1
+                    self.metrics.count("moves")
+                    alive = self.onClick(tile)
+                    yield {"type": "reveal", "tile": tile, "reason": "first click"}
+                    if not alive: # return if we lose
+                        return True
+                    if self.cascaded:
+                        break
+
+        # Probabilities are worked out again on every move. Sparse engines
+        # only ever give them to frontier tiles.
+        for i in (self.board.frontierCells() if self.sparse else self.board.coveredCells()):
+            self.tileAt(i)["probability"] = -1
+            self.tileAt(i)["error"] = 0.0
+            self.tileAt(i)["combs"] = 0
+
+        # Now, we will run two rules here before the probability calculation.
+        # Rule A: If a tile has the same number of adjacent mines as the number of unclicked tiles adjacent to it, then all of those tiles are mines.
+        # Rule B: If a tile has the same number of adjacent squares that are flags, all of those tiles are safe.
+        # Once they are stuck, the deductions over all number tiles together
+        # settle what they can, so it never has to be enumerated.
+        while not self.finished:
+            start = time.perf_counter()
+            decisions = self.ruleSweep()
+            self.metrics.addTime("rules", time.perf_counter() - start)
+            self.metrics.count("rule_sweeps")
+            if not decisions:
+                start = time.perf_counter()
+                decisions = self.deductionSweep()
+                self.metrics.addTime("deduction", time.perf_counter() - start)
+                self.metrics.count("deductions", len(decisions))
+            if not decisions:
+                break
+            self.metrics.count("rule_decisions", len(decisions))
+            yield from decisions
+        if self.finished:
+            return True
+        start = time.perf_counter()
+        self.ruleC()
+        self.metrics.addTime("rules", time.perf_counter() - start)
+
+        borderedTiles, unborderedProbability = self.calculateProbabilities()
+        yield {"type": "probabilities", "tiles": borderedTiles, "unbordered": unborderedProbability}
+
+        # Flag the ones that are certainly mines
+        for tile in borderedTiles:
+            if tile["probability"] == 100 and tile["state"] == STATE_DEFAULT:
+                self.flagTile(tile)
+                yield {"type": "flag", "tile": tile, "reason": "certain"}
+
+        # Click on the one with the lowest probability. When the whole frontier
+        # got flagged, fall back to any tile that is still covered. Looking
+        # ahead, the tile that gives the best chance to survive the next reveals.
+        candidates = [tile for tile in borderedTiles if tile["state"] == STATE_DEFAULT]
+        if not candidates:
+            candidates = self.unborderedCandidates()
+        if not candidates:
+            return False
+        tile = min(candidates, key=lambda x: x["probability"])
+        if self.lookahead and not self.sparse and not self.approximate:
+            start = time.perf_counter()
+            cell = choose_move(self, self.lookahead, self.lookaheadBudget)
+            self.metrics.addTime("lookahead", time.perf_counter() - start)
+            if cell is not None:
+                tile = self.tileAt(cell)
+        self.refresh()
+        self.moves += 1
+        self.metrics.count("moves")
+        self.onClick(tile)
+        yield {"type": "reveal", "tile": tile, "reason": "guess"}
+        return True
+
+    # Covered tiles to guess from when the frontier is empty. A sparse engine
+    # tries random cells first instead of walking the whole board.
+    def unborderedCandidates(self):
+        if self.sparse:
+            for _ in range(0, 100):
+                i = self.random.randrange(0, self.sizeX * self.sizeY)
+                if not self.board.isRevealed(i) and not self.board.isFlagged(i):
+                    return [self.tileAt(i)]
+            for i in self.board.coveredCells():
+                return [self.tileAt(i)]
+            return []
+        return [self.tileAt(i) for i in self.board.coveredCells()]
+
+    # Mine probability of every covered tile, in percent, stored in tile["probability"].
+    # Returns the bordered tiles and the probability shared by all unbordered tiles.
+    # Components too large to count exactly are sampled for budget seconds
+    # (self.moveBudget by default), and then every tile gets the half width of
+    # its 95% confidence interval in tile["error"] and self.approximate is set.
+    def calculateProbabilities(self, budget=None):
+        # Now, we always want to click on the tiles that are adjacent to the exposed tiles.
+        # Because logic.
+        # Therefore, our program will work like this:
+        # 1. Find all exposed tiles.
+        # 2. Find all bordered tiles.
+        # 3. Generate all valid arrangements of mines in the bordered tiles.
+        # 4. Get the number of mines in each arrangement
+        # 5. Subtract the number of mines in a given arrangement from the total number of mines, then
+        #    perform a calculation where we choose the number of mines left from the
+        #    unbordered tiles. This is the total number of combinations where the mines are present
+        #    in the given arrangement
+        # 6. Repeat for all arrangements.
+        # 7. Assign each cell the number of times it was determined as a mine
+        # 8. Divide each number in the cell by the total number of arrangements, which is about 2.7 x 10^102
+        # 9. Multiply result by 100 to get the probability of that cell being a mine.
+        # 10. Flag all cells with probability of 100, then click on the cell with the lowest probability.
+
+
+        # 1 and 2. The board keeps both sets up to date as tiles are revealed or flagged.
+        #    Only exposed tiles next to the frontier still constrain anything.
+        start = time.perf_counter()
+        exposedTiles = [self.tileAt(i) for i in self.board.activeCells()]
+        borderedTiles = [self.tileAt(i) for i in self.board.frontierCells()]
+
+        # 3. Bordered tiles that share no number tile do not constrain each other,
+        #    so each component of the frontier is enumerated on its own.
+        components = find_components(exposedTiles, borderedTiles)
+        self.metrics.addTime("frontier", time.perf_counter() - start)
+        self.metrics.count("components", len(components))
+        self.metrics.count("frontier_cells", len(borderedTiles))
+        start = time.perf_counter()
+        summaries = []
+        samplers = {}
+
+        if self.verbose:
+            print ("generating arrangements")
+        exact = {}
+        for n, component in enumerate(components):
+            need, constraintCells = self.component_constraints(component)
+            summaries.append(None)
+            if len(component) >= DP_MIN_CELLS and predicted_states(len(component), need, constraintCells) > self.exactLimit:
+                samplers[n] = ComponentSampler(len(component), need, constraintCells, self.random)
+            else:
+                exact[n] = (len(component), need, constraintCells)
+        for n, (counts, tallies) in zip(exact, self.solveComponents(list(exact.values()))):
+            if self.verbose:
+                print(sum(counts.values()), "arrangements counted for", len(components[n]), "tiles")
+            summaries[n] = (counts, tallies)
+        if samplers:
+            deadline = start + (self.moveBudget if budget is None else budget)
+            self.metrics.count("samples", sample_until(list(samplers.values()), deadline))
+            self.metrics.count("sampled_components", len(samplers))
+            for n, sampler in samplers.items():
+                summaries[n] = sampler.pooled()
+        self.metrics.addTime("arrangements", time.perf_counter() - start)
+
+        # Count unbordered tiles
+        unbordered = self.board.unbordered
+
+        if self.verbose:
+            print ("Calculating probabilities")
+        start = time.perf_counter()
+        # 4 - 7. Components are combined by mine count, so every combination of
+        #        their arrangements still gets weighted by comb(unbordered, remainingMines)
+        combs, cellWeights, unborderedWeight = combine_components(summaries, unbordered, self.mines - self.flagCount)
+        self.combs = combs
+        for component, weights in zip(components, cellWeights):
+            for tile, weight in zip(component, weights):
+                tile["combs"] = weight
+
+        # Calculate probability of each cell by dividing the number of arrangements with mines in each cell by total arrangements.
+        # All unbordered tiles share one probability, set in a single pass at the end.
+        # Sparse engines only keep it in self.unborderedProbability.
+        unborderedProbability = -1
+        if combs > 0:
+            for tile in borderedTiles:
+                if tile["probability"] == -1:
+                    tile["probability"] = round(tile["combs"] / combs * 100)
+            unborderedProbability = round(unborderedWeight / combs * 100)
+            if not self.sparse:
+                tileMap = self.tileMap # every tile of a dense engine is made at setup
+                for i in self.board.unborderedCells():
+                    tile = tileMap[i]
+                    if tile["probability"] == -1:
+                        tile["combs"] = unborderedWeight
+                        tile["probability"] = unborderedProbability
+        self.unborderedProbability = unborderedProbability
+        self.unborderedWeight = unborderedWeight
+        self.approximate = bool(samplers)
+        self.unborderedError = 0.0
+        if samplers:
+            self.sampledIntervals(components, summaries, samplers, unbordered)
+
+        self.metrics.addTime("probabilities", time.perf_counter() - start)
+        if self.verbose:
+            print ("did probability calculation")
+        return borderedTiles, unborderedProbability
+
+
+    # Confidence intervals of sampled probabilities, from the spread between the
+    # probabilities of the sample batches. A sampled estimate is never taken
+    # as certain, so the solver does not flag or click on it blindly. Tiles of
+    # components that were counted exactly keep their exact probability.
+    def sampledIntervals(self, components, summaries, samplers, unbordered):
+        tiles = [tile for n in samplers for tile in components[n]]
+        estimates = [[] for _ in tiles]
+        unborderedEstimates = []
+        for b in range(0, BATCHES):
+            batch = [samplers[n].batches[b] if n in samplers else summary for n, summary in enumerate(summaries)]
+            total, cellWeights, unborderedWeight = combine_components(batch, unbordered, self.mines - self.flagCount)
+            if total == 0:
+                continue
+            weights = [w for n in samplers for w in cellWeights[n]]
+            for estimate, w in zip(estimates, weights):
+                estimate.append(w / total)
+            unborderedEstimates.append(unborderedWeight / total)
+        for tile, estimate in zip(tiles, estimates):
+            tile["error"] = interval(estimate)[1] * 100 if estimate else 100.0
+            tile["probability"] = min(max(tile["probability"], 1), 99)
+        self.unborderedError = interval(unborderedEstimates)[1] * 100 if unborderedEstimates else 100.0
+
+    # Exact mine probability of a covered tile, as of the last calculateProbabilities
+    def exactProbability(self, tile):
+        return Fraction(tile["combs"], self.combs)
+
+    # Rule A: If a tile has the same number of adjacent mines as the number of unclicked tiles adjacent to it, then all of those tiles are mines.
+    def ruleA(self):
+        ruleApplied = False
+        if self.finished:
+            return False
+
+        board = self.board
+        for i in board.exposedCells():
+            unknown = board.unknownNeighbours(i)
+            # Apply rule
+            if unknown and len(unknown) == board.count(i) - board.flaggedCount(i):
+                for j in unknown:
+                    # Flag it
+                    self.flagTile(self.tileAt(j))
+                    ruleApplied = True
+
+        return ruleApplied # This means that the rule was applied at least once. So the function is worth repeating
+
+    # Rule B: If a tile has the same number of adjacent squares that are flags, all of those tiles are safe.
+    def ruleB(self):
+        ruleApplied = False
+        if self.finished:
+            return False
+
+        board = self.board
+        for i in board.exposedCells():
+            if board.flaggedCount(i) == board.count(i):
+                for j in board.unknownNeighbours(i):
+                    neighbour = self.tileAt(j)
+                    # an earlier click may have cascaded over it already
+                    if neighbour["state"] == STATE_DEFAULT:
+                        # Click it
+                        neighbour["probability"] = 0
+                        if not self.onClick(neighbour):
+                            return False
+                        ruleApplied = True
+
+        return ruleApplied
+
+    # Rules A and B for every tile at once, in one batch per call (see sweep.py).
+    # Sparse engines only look at the tiles next to the frontier.
+    # Returns the decisions it made, an empty list once the rules are stuck.
+    def ruleSweep(self):
+        decisions = []
+        if self.finished:
+            return decisions
+
+        mines, safe = forced_cells_sparse(self.board) if self.sparse else forced_cells(self.board)
+        return self.applyDecisions(mines, safe, "rule")
+
+    # Subset, difference and linear elimination reasoning over the constraints
+    # of the number tiles (see deduction.py), for when Rules A and B are stuck.
+    # Returns the decisions it made, like ruleSweep.
+    def deductionSweep(self):
+        if self.finished:
+            return []
+        mines, safe = deduce(self.frontierConstraints())
+        return self.applyDecisions(mines, safe, "deduction")
+
+    # One (cells, mines) constraint per exposed tile next to the frontier
+    def frontierConstraints(self):
+        board = self.board
+        constraints = []
+        for i in board.activeCells():
+            unknown = board.unknownNeighbours(i)
+            if unknown:
+                constraints.append((frozenset(unknown), board.count(i) - board.flaggedCount(i)))
+        return constraints
+
+    # Flag the mines, then click the safe cells
+    def applyDecisions(self, mines, safe, reason):
+        decisions = []
+        for i in mines:
+            # Flag it
+            self.flagTile(self.tileAt(i))
+            decisions.append({"type": "flag", "tile": self.tileAt(i), "reason": reason})
+        for i in safe:
+            tile = self.tileAt(i)
+            # an earlier click may have cascaded over it already
+            if tile["state"] == STATE_DEFAULT:
+                # Click it
+                tile["probability"] = 0
+                alive = self.onClick(tile)
+                decisions.append({"type": "reveal", "tile": tile, "reason": reason})
+                if not alive:
+                    break
+
+        return decisions
+
+    # iterate through the exposed tiles next to the frontier
+    def ruleC(self):
+        for i in self.board.activeCells():
+            tile = self.tileAt(i)
+            if (tile["mines"] > 2):
+                count = 0
+                for neighbour in self.neighbourTiles(i):
+                    if neighbour["isBorder"] and self.count_state(neighbour, STATE_CLICKED) == 1:
+                        count += 1
+                if count == self.count_state(tile, STATE_DEFAULT) + self.count_state(tile, STATE_FLAGGED):
+                    probability = tile["mines"] / count * 100
+                    for neighbour in self.neighbourTiles(i):
+                        neighbour["probability"] = probability
+
+
+    # Constraints of one frontier component: for every number tile touching it,
+    # how many more mines it needs and which component tiles it touches.
+    def component_constraints(self, component):
+        board = self.board
+        index = {tile["index"]: i for i, tile in enumerate(component)}
+        numbers = sorted({j for tile in component for j in board.neighbours(tile["index"]) if board.isExposed(j)})
+        need = []
+        constraintCells = []
+        for j in numbers:
+            need.append(board.count(j) - board.flaggedCount(j))
+            constraintCells.append([index[k] for k in board.neighbours(j) if k in index])
+        return need, constraintCells
+
+    # Generate all valid mine arrangements of one frontier component. Each
+    # arrangement is the tuple of component indices that hold a mine.
+    def generate_arrangements(self, component):
+        need, constraintCells = self.component_constraints(component)
+        return enumerate_arrangements(len(component), need, constraintCells)
+
+    # Same as summarise_arrangements(generate_arrangements(...)) without keeping the arrangements
+    def count_arrangements(self, component):
+        need, constraintCells = self.component_constraints(component)
+        return self.solveComponent(len(component), need, constraintCells)
+
+    # Counts and tallies of a component given its constraints. Components
+    # unchanged since an earlier move come from the component cache.
+    def solveComponent(self, size, need, constraintCells):
+        return self.solveComponents([(size, need, constraintCells)])[0]
+
+    # solveComponent of several components, given as (size, need, constraintCells).
+    # With self.workers above 1 the large ones are counted in as many processes.
+    def solveComponents(self, components):
+        keys = [(size, tuple(need), tuple(tuple(cells) for cells in constraintCells)) for size, need, constraintCells in components]
+        pool = component_pool(self.workers) if self.workers > 1 else None
+        entries, counted = solve_components(keys, pool, self.parallelMin)
+        solved = []
+        for (counts, tallies, stats), miss in zip(entries, counted):
+            solved.append((counts, tallies))
+            if not miss:
+                self.metrics.count("cache_hits")
+                continue
+            self.metrics.count("cache_misses")
+            self.metrics.count("enumeration_nodes", stats.get("nodes", 0))
+            self.metrics.count("leaves", stats.get("leaves", 0))
+            self.metrics.count("pruned_mine", stats.get("prunedMine", 0))
+            self.metrics.count("pruned_safe", stats.get("prunedSafe", 0))
+            self.metrics.count("dp_states", stats.get("states", 0))
+        return solved
+
+    # Flags around a tile. Only flagged tiles are at 100% when the rules run.
+    def mineCount(self, tile):
+        return self.board.flaggedCount(tile["index"])
+
+    def count_state(self, tile, state):
+        if state == STATE_CLICKED:
+            return self.board.revealedCount(tile["index"])
+        if state == STATE_FLAGGED:
+            return self.board.flaggedCount(tile["index"])
+        return self.board.unknownCount(tile["index"])
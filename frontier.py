@@ -0,0 +1,418 @@
+# File: frontier.py
+# Splitting the frontier into independent components and putting the
+# per-component arrangement counts back together.
+
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from math import comb
+
+
+COMPONENT_CACHE_SIZE = 4096 # component solutions kept across moves
+DP_MIN_CELLS = 16 # components this large are counted by count_arrangements_dp, smaller ones enumerated
+PARALLEL_MIN_STATES = 5000 # predicted DP states below which a component is not worth sending to another process
+
+NEIGHBOUR_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+# Group bordered tiles into components. Two bordered tiles end up in the same
+# component when some exposed number tile touches both of them, so the
+# arrangements of one component never constrain another.
+def find_components(exposedTiles, borderedTiles):
+    index = {tile["id"]: i for i, tile in enumerate(borderedTiles)}
+    parent = list(range(len(borderedTiles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for numtile in exposedTiles:
+        x = numtile["coords"]["x"]
+        y = numtile["coords"]["y"]
+        members = []
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            i = index.get(str(x + dx) + "_" + str(y + dy))
+            if i is not None:
+                members.append(i)
+        for i in members[1:]:
+            parent[find(i)] = find(members[0])
+
+    components = {}
+    for i, tile in enumerate(borderedTiles):
+        components.setdefault(find(i), []).append(tile)
+    return list(components.values())
+
+
+# Backtracking over the cells of one component. need[c] is how many more
+# mines number tile c needs, constraintCells[c] the component cells it touches.
+# A single assignment is changed in place and undone on the way back, and
+# leaf(mines) is called with the cell indices holding a mine for every valid
+# arrangement. The list it gets is reused, so leaf must not keep it.
+# Returns the number of search nodes visited. Given a stats dict, adds the
+# nodes, the leaves and the branches pruned because the cell could not be a
+# mine ("prunedMine") or could not be safe ("prunedSafe") to it.
+def backtrack_arrangements(size, need, constraintCells, leaf, stats=None):
+    cellConstraints = [[] for _ in range(size)]
+    for c, cells in enumerate(constraintCells):
+        for i in cells:
+            cellConstraints[i].append(c)
+    placed = [0] * len(need) # mines placed around each number tile
+    left = [len(cells) for cells in constraintCells] # undecided cells around each number tile
+    mines = []
+    nodes = [0, 0, 0, 0] # visited, leaves, pruned mine, pruned safe
+
+    def backtrack(idx):
+        nodes[0] += 1
+        if idx == size:
+            nodes[1] += 1
+            leaf(mines)
+            return
+        constraints = cellConstraints[idx]
+        for c in constraints:
+            left[c] -= 1
+        # can be mine: no number tile around it is full yet
+        if all(placed[c] < need[c] for c in constraints):
+            for c in constraints:
+                placed[c] += 1
+            mines.append(idx)
+            backtrack(idx + 1)
+            mines.pop()
+            for c in constraints:
+                placed[c] -= 1
+        else:
+            nodes[2] += 1
+        # can be non mine: the undecided cells can still take the mines that are missing
+        if all(need[c] - placed[c] <= left[c] for c in constraints):
+            backtrack(idx + 1)
+        else:
+            nodes[3] += 1
+        for c in constraints:
+            left[c] += 1
+
+    if size > 0:
+        backtrack(0)
+    if stats is not None:
+        for key, n in zip(("nodes", "leaves", "prunedMine", "prunedSafe"), nodes):
+            stats[key] = stats.get(key, 0) + n
+    return nodes[0]
+
+
+# Every valid arrangement, as the tuple of cell indices holding a mine
+def enumerate_arrangements(size, need, constraintCells, stats=None):
+    arrangements = []
+    backtrack_arrangements(size, need, constraintCells, lambda mines: arrangements.append(tuple(mines)), stats)
+    return arrangements
+
+
+# Streaming version of summarise_arrangements(enumerate_arrangements(...)).
+# Every leaf goes straight into the histogram of arrangements per mine count
+# and the per-cell tallies, so no arrangement is ever stored.
+def count_arrangements(size, need, constraintCells, stats=None):
+    counts = {}
+    tallies = [{} for _ in range(size)]
+
+    def leaf(mines):
+        minesPlaced = len(mines)
+        counts[minesPlaced] = counts.get(minesPlaced, 0) + 1
+        for i in mines:
+            tally = tallies[i]
+            tally[minesPlaced] = tally.get(minesPlaced, 0) + 1
+
+    backtrack_arrangements(size, need, constraintCells, leaf, stats)
+    return counts, tallies
+
+
+# Breadth-first order of the cells of a component, two cells being adjacent
+# when a number tile touches both, starting from an end of the frontier (a
+# cell with the fewest adjacent cells). Along a long thin frontier the number
+# tiles that are open at any point of this order stay few.
+def boundary_order(size, constraintCells):
+    adjacent = [set() for _ in range(size)]
+    for cells in constraintCells:
+        for i in cells:
+            adjacent[i].update(cells)
+    order = []
+    seen = [False] * size
+    for start in sorted(range(size), key=lambda i: len(adjacent[i])):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in sorted(adjacent[i]):
+                if not seen[j]:
+                    seen[j] = True
+                    queue.append(j)
+    return order
+
+
+# Same counts and tallies as count_arrangements, by dynamic programming over
+# the cells in boundary_order instead of enumerating arrangements. Between two
+# cells the only thing that matters for the rest of the cells is how many mines
+# each open number tile (touched on both sides) already has, so prefixes that
+# agree on it are merged. forward[t] maps those states before cell t to the
+# number of prefixes per mine count, backward[t] to the number of ways to
+# finish from there, and a cell's tally is what passes through it as a mine.
+# Cost grows with the number of states, i.e. with the width of the frontier,
+# not with the number of arrangements.
+def count_arrangements_dp(size, need, constraintCells, stats=None):
+    order = boundary_order(size, constraintCells)
+    position = {cell: t for t, cell in enumerate(order)}
+    cellConstraints = [[] for _ in range(size)]
+    for c, cells in enumerate(constraintCells):
+        for i in cells:
+            cellConstraints[position[i]].append(c)
+    open_ = open_constraints(size, constraintCells, position)
+    left = [[sum(1 for i in constraintCells[c] if position[i] > t) for c in range(len(need))] for t in range(size)]
+
+    # The state after cell t, or None if the choice breaks a number tile
+    def step(t, state, mine):
+        placed = dict(zip(open_[t], state))
+        for c in cellConstraints[t]:
+            p = placed.get(c, 0) + mine
+            if p > need[c] or need[c] - p > left[t][c]:
+                return None
+            placed[c] = p
+        return tuple(placed[c] for c in open_[t + 1])
+
+    forward = [{} for _ in range(size + 1)]
+    forward[0][()] = {0: 1}
+    for t in range(size):
+        for state, ways in forward[t].items():
+            for mine in (0, 1):
+                nextState = step(t, state, mine)
+                if nextState is not None:
+                    add_shifted(forward[t + 1].setdefault(nextState, {}), ways, mine)
+
+    backward = [{} for _ in range(size + 1)]
+    backward[size][()] = {0: 1}
+    tallies = [{} for _ in range(size)]
+    for t in range(size - 1, -1, -1):
+        for state, prefix in forward[t].items():
+            ways = {}
+            for mine in (0, 1):
+                suffix = backward[t + 1].get(step(t, state, mine))
+                if suffix:
+                    add_shifted(ways, suffix, mine)
+                    if mine:
+                        tally = tallies[order[t]]
+                        for k1, a in prefix.items():
+                            for k2, b in suffix.items():
+                                tally[k1 + 1 + k2] = tally.get(k1 + 1 + k2, 0) + a * b
+            if ways:
+                backward[t][state] = ways
+
+    if stats is not None:
+        stats["states"] = stats.get("states", 0) + sum(len(states) for states in forward)
+    counts = backward[0].get((), {}) if size > 0 else {}
+    return counts, tallies
+
+
+# open[t]: the number tiles touched both before cell t and at or after it in
+# the order, whose mine counts make up the DP state between cells
+def open_constraints(size, constraintCells, position):
+    first = [min(position[i] for i in cells) if cells else -1 for cells in constraintCells]
+    last = [max(position[i] for i in cells) if cells else -1 for cells in constraintCells]
+    return [[c for c in range(len(constraintCells)) if first[c] < t <= last[c]] for t in range(size + 1)]
+
+
+# Upper bound on the states count_arrangements_dp would visit, without running it
+def predicted_states(size, need, constraintCells):
+    position = {cell: t for t, cell in enumerate(boundary_order(size, constraintCells))}
+    states = 0
+    for t, open_ in enumerate(open_constraints(size, constraintCells, position)):
+        bound = 1
+        for c in open_:
+            seen = sum(1 for i in constraintCells[c] if position[i] < t)
+            bound *= min(need[c], seen) + 1
+        states += min(bound, 2 ** t)
+    return states
+
+
+# ways shifted by mine mines, added into total
+def add_shifted(total, ways, mine):
+    for k, n in ways.items():
+        total[k + mine] = total.get(k + mine, 0) + n
+
+
+# Counts, tallies and search stats of one component (see backtrack_arrangements
+# and count_arrangements_dp): need[c] is the residual mine count of number tile
+# c, constraintCells[c] the component cells around it.
+def count_component(size, need, constraintCells):
+    stats = {}
+    if size >= DP_MIN_CELLS:
+        counts, tallies = count_arrangements_dp(size, need, constraintCells, stats)
+    else:
+        counts, tallies = count_arrangements(size, need, constraintCells, stats)
+    return counts, tallies, stats
+
+
+# Least recently used component solutions, by their constraints
+class ComponentCache:
+
+    def __init__(self, maxsize=COMPONENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    # The solution of a component, None if it is not cached
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Most of the frontier does not change from one move to the next, and an
+# unchanged component has the same constraints, so its counts come straight
+# from the cache. Components with the same shape anywhere on the board share
+# an entry.
+component_cache = ComponentCache()
+
+
+# count_component of a component, kept across moves. The key is the
+# constraints as tuples. The counts and tallies are shared between callers and
+# must not be changed.
+def solve_component(size, need, constraintCells):
+    key = (size, need, constraintCells)
+    entry = component_cache.get(key)
+    if entry is None:
+        entry = count_component(size, need, constraintCells)
+        component_cache.put(key, entry)
+    return entry
+
+
+# solve_component of every component of a move, the components that are not
+# cached and have at least minStates predicted states counted in the processes
+# of pool at the same time, and the rest here meanwhile. Returns the solutions
+# and, for every component, whether it had to be counted.
+def solve_components(keys, pool=None, minStates=PARALLEL_MIN_STATES):
+    entries = [component_cache.get(key) for key in keys]
+    counted = [entry is None for entry in entries]
+    futures = {}
+    if pool is not None:
+        for n, key in enumerate(keys):
+            if entries[n] is None and key[0] >= DP_MIN_CELLS and predicted_states(*key) >= minStates:
+                futures[n] = pool.submit(count_component, *key)
+    for n, key in enumerate(keys):
+        if entries[n] is None and n not in futures:
+            # the same component may come up twice in a move
+            entries[n] = component_cache.get(key)
+            if entries[n] is None:
+                entries[n] = count_component(*key)
+                component_cache.put(key, entries[n])
+            else:
+                counted[n] = False
+    for n, future in futures.items():
+        entries[n] = future.result()
+        component_cache.put(keys[n], entries[n])
+    return entries, counted
+
+
+# A process pool for solve_components, shared by every engine of the process
+@lru_cache(maxsize=None)
+def component_pool(workers):
+    return ProcessPoolExecutor(workers)
+
+
+# Reduce the arrangements of one component to the number of arrangements per
+# mine count, and for every cell the number of those in which it is a mine.
+def summarise_arrangements(arrangements, size):
+    counts = {}
+    tallies = [{} for _ in range(size)]
+    for arrangement in arrangements:
+        minesPlaced = len(arrangement)
+        counts[minesPlaced] = counts.get(minesPlaced, 0) + 1
+        for i in arrangement:
+            tallies[i][minesPlaced] = tallies[i].get(minesPlaced, 0) + 1
+    return counts, tallies
+
+
+# Number of ways to place m mines over several components, as {m: ways}
+def convolve(countsList):
+    total = {0: 1}
+    for counts in countsList:
+        result = {}
+        for m, ways in total.items():
+            for k, n in counts.items():
+                result[m + k] = result.get(m + k, 0) + ways * n
+        total = result
+    return total
+
+
+# Number of arrangements of the whole board: every way of placing m mines on
+# the frontier times comb(unbordered, remainingMines - m). Unlike the weights of
+# combine_components it means the same from one position to another.
+def count_total(summaries, unbordered, remainingMines):
+    total = 0
+    for m, ways in convolve([counts for counts, _ in summaries]).items():
+        if 0 <= remainingMines - m <= unbordered:
+            total += ways * comb(unbordered, remainingMines - m)
+    return total
+
+
+# Weights of placing the rest of the mines in the unbordered tiles, for
+# m = 0 .. maxMines mines on the frontier. comb(unbordered, remainingMines - m)
+# itself can have hundreds of digits, but only the ratios between the entries
+# matter:
+#   comb(U, R - m - 1) / comb(U, R - m) = (R - m) / (U - R + m + 1)
+# so the table is built from those ratios, scaled to stay integer. Entries are
+# proportional to unbordered * comb(U, R - m), the second table to the weight
+# of one given unbordered tile holding a mine, comb(U - 1, R - m - 1).
+# Cached, since the same (unbordered, remainingMines) comes back move after move.
+@lru_cache(maxsize=256)
+def unbordered_weights(unbordered, remainingMines, maxMines):
+    U, R = unbordered, remainingMines
+    scaled = []
+    for m in range(0, maxMines + 1):
+        if R - m < 0 or R - m > U:
+            scaled.append(0)
+            continue
+        w = 1
+        for j in range(0, m):
+            w *= R - j
+        for j in range(m, maxMines):
+            w *= U - R + j + 1
+        scaled.append(w)
+    weights = tuple(w * max(U, 1) for w in scaled)
+    unborderedWeights = tuple(w * (R - m) for m, w in enumerate(scaled))
+    return weights, unborderedWeights
+
+
+# Combine per-component summaries into the global weights. Every way of
+# placing m mines on the frontier leaves comb(unbordered, remainingMines - m)
+# ways to place the rest in the unbordered tiles.
+# Returns the total weight, the weight of every component cell being a mine
+# (one list per component) and the weight of a single unbordered cell being a
+# mine. All of them are exact integers on the same scale, so any weight divided
+# by the total is the exact probability.
+def combine_components(summaries, unbordered, remainingMines):
+    maxMines = sum(max(counts, default=0) for counts, _ in summaries)
+    weights, unborderedWeights = unbordered_weights(unbordered, remainingMines, maxMines)
+
+    total = 0
+    unborderedWeight = 0
+    for m, ways in convolve([counts for counts, _ in summaries]).items():
+        total += ways * weights[m]
+        unborderedWeight += ways * unborderedWeights[m]
+
+    cellWeights = []
+    for i, (counts, tallies) in enumerate(summaries):
+        others = convolve([c for j, (c, _) in enumerate(summaries) if j != i])
+        # weight of the rest of the board given k mines in this component
+        rest = {k: sum(ways * weights[k + m] for m, ways in others.items()) for k in counts}
+        cellWeights.append([sum(n * rest[k] for k, n in tally.items()) for tally in tallies])
+
+    return total, cellWeights, unborderedWeight
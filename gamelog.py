@@ -0,0 +1,193 @@
+# File: gamelog.py
+# Append-only binary log of solver games, and a replayer for it.
+#
+# A game is recorded as the board it was played on (its seed, or its mines
+# when it did not come from a seed) followed by every move the solver made,
+# a few bytes each. Cascades are not recorded, replaying a reveal cascades the
+# same way. Any position of any game can be rebuilt by replaying a prefix of
+# its moves, and the solver started again from there.
+#
+#   python gamelog.py games.log                        list the games of a log
+#   python gamelog.py games.log --game 17 --move 40    replay a game up to move 40
+#                                                      and let the solver finish it
+#
+# Records, little-endian, each starting with its type byte:
+#   GAME      seed i64 (-1 without one), sizeX u16, sizeY u16, mines u32, sparse u8
+#   POSITION  counts of mines, revealed and flagged cells u32 x3, then the cells u32
+#   REVEAL    cell u32, reason u8            (REVEAL_P adds probability f32)
+#   FLAG      cell u32, reason u8
+#   END       won u8
+
+import argparse
+import struct
+import sys
+
+from engine import MinesweeperEngine
+
+
+GAME = 1
+POSITION = 2
+REVEAL = 3
+REVEAL_P = 4
+FLAG = 5
+END = 6
+
+REASONS = ["first click", "rule", "deduction", "guess", "certain"]
+REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+
+GAME_RECORD = struct.Struct("<BqHHIB")
+POSITION_RECORD = struct.Struct("<BIII")
+MOVE_RECORD = struct.Struct("<BIB")
+PROBABILITY = struct.Struct("<f")
+END_RECORD = struct.Struct("<BB")
+
+
+class GameLogWriter:
+
+    # out is any binary file, e.g. one opened with "ab" or an io.BytesIO
+    def __init__(self, out, probabilities=True):
+        self.out = out
+        self.probabilities = probabilities # record the probability of every guess
+
+    def startGame(self, game):
+        seed = game.seed if isinstance(game.seed, int) else -1
+        self.out.write(GAME_RECORD.pack(GAME, seed, game.sizeX, game.sizeY, game.mines, game.sparse))
+        revealed = game.board.revealedCells()
+        flagged = game.board.flaggedCells()
+        # A seed only describes a board that was placed from it and not touched yet
+        if seed == -1 or game.layout is not None or revealed or flagged:
+            mines = game.board.mineCells()
+            self.out.write(POSITION_RECORD.pack(POSITION, len(mines), len(revealed), len(flagged)))
+            cells = mines + revealed + flagged
+            self.out.write(struct.pack("<%dI" % len(cells), *cells))
+
+    # One event of MinesweeperEngine.solveSteps
+    def event(self, game, event):
+        if event["type"] == "reveal":
+            cell = event["tile"]["index"]
+            reason = REASON_CODES[event["reason"]]
+            if self.probabilities and event["reason"] == "guess":
+                self.out.write(MOVE_RECORD.pack(REVEAL_P, cell, reason))
+                self.out.write(PROBABILITY.pack(guess_probability(game, event["tile"])))
+            else:
+                self.out.write(MOVE_RECORD.pack(REVEAL, cell, reason))
+        elif event["type"] == "flag":
+            self.out.write(MOVE_RECORD.pack(FLAG, event["tile"]["index"], REASON_CODES[event["reason"]]))
+        elif event["type"] == "gameover":
+            self.out.write(END_RECORD.pack(END, event["won"]))
+
+
+# Probability the solver gave the tile it guessed, 0 .. 1. Sparse engines
+# give no probability to tiles off the frontier, they share the unbordered one.
+def guess_probability(game, tile):
+    if game.combs:
+        if game.sparse and tile["probability"] == -1:
+            return game.unborderedWeight / game.combs
+        return tile["combs"] / game.combs
+    return max(tile["probability"], 0) / 100
+
+
+class GameRecord:
+
+    def __init__(self, seed, sizeX, sizeY, mines, sparse):
+        self.seed = None if seed == -1 else seed
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.mines = mines
+        self.sparse = bool(sparse)
+        self.position = None # for loadPosition, when the game did not start from its seed
+        self.moves = [] # (type "reveal" | "flag", cell, reason, probability or None)
+        self.won = None # None if the game did not finish
+
+    def guesses(self):
+        return sum(1 for move in self.moves if move[2] == "guess")
+
+    def flags(self):
+        return sum(1 for move in self.moves if move[0] == "flag")
+
+
+# The games of a log, in the order they were written
+def read_games(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    games = []
+    offset = 0
+    while offset < len(data):
+        kind = data[offset]
+        if kind == GAME:
+            _, seed, sizeX, sizeY, mines, sparse = GAME_RECORD.unpack_from(data, offset)
+            offset += GAME_RECORD.size
+            games.append(GameRecord(seed, sizeX, sizeY, mines, sparse))
+        elif kind == POSITION:
+            _, nMines, nRevealed, nFlagged = POSITION_RECORD.unpack_from(data, offset)
+            offset += POSITION_RECORD.size
+            total = nMines + nRevealed + nFlagged
+            cells = list(struct.unpack_from("<%dI" % total, data, offset))
+            offset += 4 * total
+            games[-1].position = {
+                "sizeX": games[-1].sizeX,
+                "sizeY": games[-1].sizeY,
+                "mines": cells[:nMines],
+                "revealed": cells[nMines:nMines + nRevealed],
+                "flagged": cells[nMines + nRevealed:],
+            }
+        elif kind in (REVEAL, REVEAL_P, FLAG):
+            _, cell, reason = MOVE_RECORD.unpack_from(data, offset)
+            offset += MOVE_RECORD.size
+            probability = None
+            if kind == REVEAL_P:
+                probability = PROBABILITY.unpack_from(data, offset)[0]
+                offset += PROBABILITY.size
+            games[-1].moves.append(("flag" if kind == FLAG else "reveal", cell, REASONS[reason], probability))
+        elif kind == END:
+            games[-1].won = bool(END_RECORD.unpack_from(data, offset)[1])
+            offset += END_RECORD.size
+        else:
+            raise ValueError("corrupt game log %s at byte %d" % (path, offset))
+    return games
+
+
+# A fresh engine with the game's board, after its first moves moves (all of
+# them by default). Call solve() on it to let the solver carry on from there.
+def replay(record, moves=None):
+    game = MinesweeperEngine(record.seed, record.sizeX, record.sizeY, record.mines, sparse=record.sparse)
+    if record.position is not None:
+        game.loadPosition(record.position)
+    for kind, cell, reason, _ in record.moves[:moves]:
+        tile = game.tileAt(cell)
+        if kind == "flag":
+            game.flagTile(tile)
+        else:
+            if reason != "first click" and reason != "guess":
+                tile["probability"] = 0
+            game.moves += reason in ("first click", "guess")
+            game.onClick(tile)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or replay the games of a solver game log")
+    parser.add_argument("log", help="game log written by the solver")
+    parser.add_argument("--game", type=int, default=None, help="game to replay, by its number in the log")
+    parser.add_argument("--move", type=int, default=None, help="replay this many moves (default: all)")
+    args = parser.parse_args()
+
+    games = read_games(args.log)
+    if args.game is None:
+        for n, record in enumerate(games):
+            sys.stdout.write("%d\tseed %s\t%d moves\t%d guesses\t%d flags\t%s\n" % (
+                n, record.seed, len(record.moves), record.guesses(), record.flags(),
+                "unfinished" if record.won is None else "won" if record.won else "lost"))
+        return
+
+    record = games[args.game]
+    game = replay(record, args.move)
+    sys.stdout.write("replayed %d of %d moves: %d tiles clicked, %d flags\n" % (
+        len(record.moves[:args.move]), len(record.moves), game.clickedCount, game.flagCount))
+    if not game.finished:
+        game.solve()
+    sys.stdout.write("solver from there: %s\n" % ("won" if game.won else "lost"))
+
+
+if __name__ == "__main__":
+    main()
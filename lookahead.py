@@ -0,0 +1,219 @@
+# File: lookahead.py
+# Choosing the guess by looking reveals ahead, instead of taking the tile with
+# the lowest mine probability.
+#
+# The value of a position, looking depth reveals ahead, is the chance of
+# surviving them when every reveal is chosen as well as possible:
+#   value(position, 0) = 1
+#   value(position, d) = max over cells c of
+#       sum over numbers v of P(c is safe and shows v) * value(position + (c shows v), d - 1)
+# P(c is safe and shows v) is the number of arrangements of the mines that fit
+# the position with c showing v, over the number of arrangements that fit the
+# position. All the positions a cell can lead to are solved together by
+# multiboard.solve_boards. A certain safe cell is a reveal that cannot lose, so
+# at depth 2 a guess that leaves a certain safe cell behind is worth its whole
+# survival chance, and a guess that leaves another 50/50 only half of it.
+#
+# Only the safest CANDIDATES cells of the frontier and one unbordered cell (the
+# one with the fewest neighbours) are tried at every position. Positions reached
+# in different orders are the same position, so solved positions and values are
+# kept in a transposition table by Zobrist hash: a random 64-bit key for every
+# (cell, number) and (cell, flag), xored together. The table outlives the game,
+# a position only depends on what is visible and not on where the mines are.
+
+import random
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from bitboard import neighbour_indices
+from frontier import ComponentCache
+from multiboard import solve_boards
+from sampling import SAMPLE_BUDGET
+from sweep import mask_to_array
+
+
+DEPTH = 2 # reveals looked ahead
+CANDIDATES = 6 # frontier cells tried at every position, the safest ones
+BUDGET = 0.2 # seconds per move, deeper searches are only started while there is time left
+TABLE_SIZE = 1 << 14 # positions and values kept
+FLAG = 9 # Zobrist key of a flag, 0 .. 8 being the numbers
+
+
+# Positions (and their values) by (size, mines, Zobrist hash), least recently used dropped first
+transposition_table = ComponentCache(TABLE_SIZE)
+
+
+@lru_cache(maxsize=8)
+def zobrist_keys(area):
+    rng = random.Random(area)
+    return [[rng.getrandbits(64) for _ in range(0, FLAG + 1)] for _ in range(0, area)]
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Lookahead:
+
+    # One board: revealed and flagged boolean arrays, the numbers of the
+    # revealed cells, the total number of mines
+    def __init__(self, revealed, flagged, counts, mines, deadline=None, table=transposition_table):
+        self.revealed = revealed
+        self.flagged = flagged
+        self.counts = np.where(revealed, counts, 0).astype(np.uint8)
+        self.sizeX, self.sizeY = revealed.shape
+        self.mines = mines
+        self.deadline = deadline
+        self.table = table
+        self.neighbours = neighbour_indices(self.sizeX, self.sizeY)
+        self.keys = zobrist_keys(self.sizeX * self.sizeY)
+        self.hash = 0
+        for i in np.flatnonzero(revealed).tolist():
+            self.hash ^= self.keys[i][int(self.counts.flat[i])]
+        for i in np.flatnonzero(flagged).tolist():
+            self.hash ^= self.keys[i][FLAG]
+
+    def key(self, position, kind):
+        return (self.sizeX, self.sizeY, self.mines, position, kind)
+
+    # Solve positions, given as (hash, reveals) with reveals a tuple of (cell,
+    # number) on top of the board, that are not in the table yet. All of them
+    # in one call. Only what the search reads is kept of a solved position: its
+    # number of arrangements, whether it was sampled, whether anything is left
+    # to reveal, and for every candidate (see candidates) its mine probability,
+    # whether it is on the frontier and the numbers it could show. Samples for
+    # at most the time left, and once that has run out only exact positions are
+    # kept and OutOfTime is raised.
+    def solve(self, positions):
+        missing = {h: reveals for h, reveals in positions if self.table.get(self.key(h, "solved")) is None}
+        if not missing:
+            return
+        budget = SAMPLE_BUDGET
+        if self.deadline is not None:
+            budget = min(budget, self.deadline - time.perf_counter())
+            if budget <= 0:
+                raise OutOfTime()
+        K = len(missing)
+        revealed = np.repeat(self.revealed[None], K, axis=0)
+        counts = np.repeat(self.counts[None], K, axis=0)
+        for k, reveals in enumerate(missing.values()):
+            for cell, number in reveals:
+                revealed[k].flat[cell] = True
+                counts[k].flat[cell] = number
+        flagged = np.repeat(self.flagged[None], K, axis=0)
+        results = solve_boards(revealed, flagged, counts, self.mines, budget=budget)
+        late = self.deadline is not None and time.perf_counter() > self.deadline
+        for k, h in enumerate(missing):
+            if late and results["approximate"][k]:
+                continue # sampled for less than it should have been
+            probability = results["probability"][k].reshape(-1)
+            frontier = results["frontier"][k].reshape(-1)
+            covered = ~revealed[k].reshape(-1) & (probability < 1)
+            safe = results["safe"][k].reshape(-1)
+            mines = (results["mines"][k] | flagged[k]).reshape(-1)
+            unknown = ~(revealed[k].reshape(-1) | mines | safe)
+            cells = self.candidates(probability, frontier, covered, safe)
+            self.table.put(self.key(h, "solved"), {
+                "arrangements": results["arrangements"][k],
+                "approximate": bool(results["approximate"][k]),
+                "open": bool(covered.any()),
+                "candidates": {cell: (float(probability[cell]), bool(frontier[cell]), self.numbers(cell, mines, unknown)) for cell in cells},
+            })
+        if late:
+            raise OutOfTime()
+
+    def solved(self, h, reveals):
+        self.solve([(h, reveals)])
+        return self.table.get(self.key(h, "solved"))
+
+    # Cells worth trying from a solved position: a certain safe cell if there is
+    # one, otherwise the safest cells of the frontier and one unbordered cell
+    def candidates(self, probability, frontier, covered, safe):
+        if safe.any():
+            return [int(np.flatnonzero(safe)[0])]
+        cells = np.flatnonzero(covered & frontier)
+        cells = cells[np.argsort(probability[cells], kind="stable")[:CANDIDATES]].tolist()
+        interior = np.flatnonzero(covered & ~frontier).tolist()
+        if interior:
+            cells.append(min(interior, key=lambda i: (len(self.neighbours[i]), i)))
+        return cells
+
+    # Numbers cell could show, given the cells certainly mines and the covered
+    # cells not known either way
+    def numbers(self, cell, mines, unknown):
+        around = self.neighbours[cell]
+        known = sum(1 for j in around if mines[j])
+        open_ = sum(1 for j in around if unknown[j])
+        return range(known, known + open_ + 1)
+
+    # Survival chance of every candidate of a position, looking depth reveals
+    # ahead, as a dict cell -> chance
+    def scores(self, h, reveals, depth):
+        entry = self.solved(h, reveals)
+        candidates = entry["candidates"]
+        if depth == 1:
+            return {cell: 1.0 - p for cell, (p, _, _) in candidates.items()}
+        children = {cell: [(h ^ self.keys[cell][v], reveals + ((cell, v),)) for v in numbers] for cell, (_, _, numbers) in candidates.items()}
+        self.solve([child for outcomes in children.values() for child in outcomes])
+        scores = {}
+        for cell, outcomes in children.items():
+            score = 0.0
+            for childHash, childReveals in outcomes:
+                ways = self.solved(childHash, childReveals)["arrangements"]
+                if ways:
+                    score += ways / entry["arrangements"] * self.value(childHash, childReveals, depth - 1)
+            scores[cell] = score
+        return scores
+
+    def value(self, h, reveals, depth):
+        if depth == 0:
+            return 1.0
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise OutOfTime()
+        cached = self.table.get(self.key(h, depth))
+        if cached is not None:
+            return cached
+        entry = self.solved(h, reveals)
+        if entry["approximate"]:
+            value = 1.0 # not counted exactly, so not looked into
+        elif not entry["arrangements"]:
+            value = 0.0
+        elif not entry["open"]:
+            value = 1.0 # nothing left to reveal, the game is won
+        else:
+            value = max(self.scores(h, reveals, depth).values())
+        self.table.put(self.key(h, depth), value)
+        return value
+
+    # The cell to reveal and its survival chance, searching 1, 2, ... depth
+    # reveals ahead while there is time. None if the position was sampled.
+    def choose(self, depth=DEPTH):
+        try:
+            entry = self.solved(self.hash, ())
+        except OutOfTime:
+            return None
+        if entry["approximate"] or not entry["arrangements"]:
+            return None
+        best = None
+        for d in range(1, depth + 1):
+            try:
+                scores = self.scores(self.hash, (), d)
+            except OutOfTime:
+                break
+            # equal chances go to the cell least likely a mine, then to the frontier
+            candidates = entry["candidates"]
+            cell = max(scores, key=lambda i: (round(scores[i], 12), -candidates[i][0], candidates[i][1], -i))
+            best = (cell, scores[cell])
+        return best
+
+
+# The cell an engine with a dense board should guess, None to fall back to the lowest probability
+def choose_move(game, depth=DEPTH, budget=BUDGET):
+    board = game.board
+    revealed = mask_to_array(board.revealed, game.sizeX, game.sizeY)
+    flagged = mask_to_array(board.flagged, game.sizeX, game.sizeY)
+    counts = np.frombuffer(bytes(board.counts), dtype=np.uint8).reshape(game.sizeX, game.sizeY)
+    best = Lookahead(revealed, flagged, counts, game.mines, time.perf_counter() + budget).choose(depth)
+    return None if best is None else best[0]
@@ -0,0 +1,84 @@
+# File: metrics.py
+# Counters and per-phase timers of the solver. Every engine keeps one Metrics
+# per game in engine.metrics; read it directly, as a snapshot dict, as JSON
+# lines (one per move, see MinesweeperEngine.metricsLog) or as Prometheus text.
+
+import json
+
+
+PREFIX = "minesweeper_solver"
+
+# Phases of a move, timed in seconds
+PHASES = ("rules", "deduction", "frontier", "arrangements", "probabilities", "lookahead")
+
+COUNTERS = (
+    "moves", # clicks the solver chose itself, first click and guesses
+    "rule_sweeps", # passes of Rule A and B over the board
+    "rule_decisions", # tiles flagged or revealed by the rules and deductions
+    "deductions", # tiles flagged or revealed by the deductions alone
+    "components", # frontier components enumerated
+    "frontier_cells", # frontier cells enumerated
+    "enumeration_nodes", # search nodes visited by the backtracking
+    "pruned_mine", # nodes where the cell could not be a mine
+    "pruned_safe", # nodes where the cell could not be safe
+    "leaves", # valid arrangements found
+    "dp_states", # states of the counting DP, for components too large to enumerate
+    "sampled_components", # components too large to count, sampled instead
+    "samples", # arrangements drawn from them
+    "cache_hits", # components whose counts came from the component cache
+    "cache_misses", # components that had to be enumerated
+)
+
+
+class Metrics:
+
+    def __init__(self):
+        self.counters = {name: 0 for name in COUNTERS}
+        self.seconds = {phase: 0.0 for phase in PHASES}
+        self.last = self.snapshot()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def addTime(self, phase, seconds):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def snapshot(self):
+        return {"counters": dict(self.counters), "seconds": dict(self.seconds)}
+
+    # Everything since the previous lap, or since the start for the first one
+    def lap(self):
+        now = self.snapshot()
+        delta = {
+            "counters": {name: n - self.last["counters"].get(name, 0) for name, n in now["counters"].items()},
+            "seconds": {phase: s - self.last["seconds"].get(phase, 0.0) for phase, s in now["seconds"].items()},
+        }
+        self.last = now
+        return delta
+
+    # Add a snapshot, e.g. of another game, to these totals
+    def merge(self, snapshot):
+        for name, n in snapshot["counters"].items():
+            self.count(name, n)
+        for phase, seconds in snapshot["seconds"].items():
+            self.addTime(phase, seconds)
+
+    def prometheus(self, prefix=PREFIX):
+        return prometheus_text(self.snapshot(), prefix)
+
+
+# A snapshot as one line of JSON, with extra fields such as the move number
+def json_line(snapshot, **extra):
+    return json.dumps(dict(extra, **snapshot), sort_keys=True) + "\n"
+
+
+# A snapshot in the Prometheus text exposition format
+def prometheus_text(snapshot, prefix=PREFIX):
+    lines = []
+    for name, n in snapshot["counters"].items():
+        lines.append("# TYPE %s_%s_total counter" % (prefix, name))
+        lines.append("%s_%s_total %d" % (prefix, name, n))
+    lines.append("# TYPE %s_phase_seconds_total counter" % prefix)
+    for phase, seconds in snapshot["seconds"].items():
+        lines.append('%s_phase_seconds_total{phase="%s"} %.6f' % (prefix, phase, seconds))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,217 @@
+# File: multiboard.py
+# The solver over many boards at once. Boards come in as stacked arrays, shape
+# (K, sizeX, sizeY), and go through the same steps as a move of the engine:
+#
+# 1. Rules A and B, run to a fixed point on the whole stack at once (sweep.py).
+#    Cells they prove safe are not revealed, their numbers are not known, but
+#    they are taken out of the unknowns like the mines are flagged.
+# 2. Frontier extraction, also on the whole stack: every (number, covered
+#    neighbour) pair of every board is one edge, and components are labelled by
+#    propagating the smallest cell id along the edges of all boards together.
+# 3. Probabilities. Components are counted by solve_component, so a component
+#    seen on many boards is counted once, and combined board by board.
+#
+# Only building the constraints of a component and combining the components of
+# a board are done per component and per board, everything else is done once
+# for the whole stack. No engine and no tiles are created.
+#
+#   results = solve_boards(revealed, flagged, counts, mines)
+#   results["probability"][k]    mine probabilities of board k, NaN on revealed cells
+
+import random
+import time
+
+import numpy as np
+
+from frontier import NEIGHBOUR_OFFSETS, solve_component, combine_components, count_total, predicted_states, DP_MIN_CELLS
+from sampling import ComponentSampler, sample_until, EXACT_LIMIT, SAMPLE_BUDGET
+from sweep import neighbourhood_sum, forced_arrays
+
+
+# Rules A and B until neither decides anything on any board. Returns the cells
+# they proved mines and safe, flags not included.
+def forced_boards(revealed, flagged, counts):
+    mines = flagged.copy()
+    safe = np.zeros_like(flagged)
+    while True:
+        newMines, newSafe = forced_arrays(revealed, mines, counts, safe)
+        if not newMines.any() and not newSafe.any():
+            return mines & ~flagged, safe
+        mines |= newMines
+        safe |= newSafe
+
+
+# Every pair of a cell in a and a neighbouring cell in b, over a stack of
+# boards, as arrays (board, flat index in a, flat index in b)
+def neighbour_pairs(a, b):
+    K, sizeX, sizeY = a.shape
+    boards, cellsA, cellsB = [], [], []
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        # (x, y) in a against (x + dx, y + dy) in b
+        near = a[:, max(0, -dx):sizeX - max(0, dx), max(0, -dy):sizeY - max(0, dy)] \
+            & b[:, max(0, dx):sizeX - max(0, -dx), max(0, dy):sizeY - max(0, -dy)]
+        k, x, y = np.nonzero(near)
+        x += max(0, -dx)
+        y += max(0, -dy)
+        boards.append(k)
+        cellsA.append(x * sizeY + y)
+        cellsB.append((x + dx) * sizeY + y + dy)
+    return np.concatenate(boards), np.concatenate(cellsA), np.concatenate(cellsB)
+
+
+# Component of every node of a bipartite graph given by its edges (number,
+# cell), as the smallest cell id in it. Labels spread along all edges at once
+# and jump to the label of their label, so it takes a few passes, not one per cell.
+def label_components(numbers, cells, nNumbers, nCells):
+    label = np.arange(nCells)
+    while True:
+        numberLabel = np.full(nNumbers, nCells)
+        np.minimum.at(numberLabel, numbers, label[cells])
+        new = label.copy()
+        np.minimum.at(new, cells, numberLabel[numbers])
+        new = new[new]
+        if np.array_equal(new, label):
+            return label
+        label = new
+
+
+# Frontier components of every board: the edges (board, number, cell) between
+# the numbers that still need mines and their unknown neighbours, the component
+# of every edge, and the need of every number (by flat index of the stack).
+def frontier_edges(revealed, mines, unknown, counts):
+    K, sizeX, sizeY = revealed.shape
+    area = sizeX * sizeY
+    boards, numbers, cells = neighbour_pairs(revealed & (counts > 0), unknown)
+    numbers = boards * area + numbers
+    cells = boards * area + cells
+    need = counts.astype(np.int16).reshape(-1) - neighbourhood_sum(mines).reshape(-1)
+
+    numberIds, numberIndex = np.unique(numbers, return_inverse=True)
+    cellIds, cellIndex = np.unique(cells, return_inverse=True)
+    label = label_components(numberIndex, cellIndex, len(numberIds), len(cellIds))
+    return numbers, cells, cellIds[label[cellIndex]], need
+
+
+# Solve a stack of K boards. revealed and flagged are boolean arrays and counts
+# the numbers of the revealed cells, all shaped (K, sizeX, sizeY), and mines is
+# the total number of mines of every board (one int, or an array of K).
+# Components with more than exactLimit predicted states are sampled, all of
+# them together for at most budget seconds. Returns a dict of arrays:
+#   probability  (K, sizeX, sizeY) mine probability, 1 on flags, NaN on revealed cells
+#   mines, safe  (K, sizeX, sizeY) cells certainly mines (flags not included) and safe
+#   frontier     (K, sizeX, sizeY) unknown cells next to a number
+#   move         (K,) flat index of the cell to click, -1 if none
+#   approximate  (K,) some of the board was sampled, nothing sampled is certain
+#   valid        (K,) some arrangement of the mines fits the board
+#   arrangements list of K ints, the number of arrangements of the mines that
+#                fit each board (0 for sampled boards), comparable between boards
+def solve_boards(revealed, flagged, counts, mines, exactLimit=EXACT_LIMIT, budget=SAMPLE_BUDGET, seed=None):
+    start = time.perf_counter()
+    revealed = np.asarray(revealed, dtype=bool)
+    flagged = np.asarray(flagged, dtype=bool)
+    counts = np.asarray(counts)
+    K, sizeX, sizeY = revealed.shape
+    area = sizeX * sizeY
+    totals = np.broadcast_to(np.asarray(mines), (K,))
+
+    # 1. Rules
+    forcedMines, forcedSafe = forced_boards(revealed, flagged, counts)
+    known = flagged | forcedMines
+    unknown = ~(revealed | known | forcedSafe)
+
+    # 2. Frontier
+    numbers, cells, labels, need = frontier_edges(revealed, known, unknown, counts)
+    frontier = np.zeros(K * area, dtype=bool)
+    frontier[cells] = True
+    frontier = frontier.reshape(K, sizeX, sizeY)
+    unbordered = (unknown & ~frontier).sum(axis=(1, 2))
+    remaining = totals - known.sum(axis=(1, 2))
+    # A number with more mines around it than it shows, or fewer than it shows
+    # and not enough unknown cells left, makes the board impossible. The rules
+    # stop at such a number without saying so, and it may touch no unknown cell.
+    shortfall = counts.astype(np.int16) - neighbourhood_sum(known)
+    broken = (revealed & ((shortfall < 0) | (shortfall > neighbourhood_sum(unknown)))).any(axis=(1, 2))
+
+    # 3. Components, edges sorted by board (the high part of every id), component and number
+    order = np.lexsort((cells, numbers, labels))
+    numbers, cells, labels = numbers[order], cells[order], labels[order]
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if len(labels) else np.zeros(0, dtype=int)
+    ends = np.r_[starts[1:], len(labels)]
+
+    components = [[] for _ in range(K)] # per board: (cell ids, summary)
+    samplers = []
+    rng = random.Random(seed)
+    approximate = np.zeros(K, dtype=bool)
+    for first, last in zip(starts.tolist(), ends.tolist()):
+        componentNumbers = numbers[first:last].tolist()
+        componentCells = cells[first:last].tolist()
+        ids = sorted(set(componentCells))
+        index = {cell: i for i, cell in enumerate(ids)}
+        constraints = {}
+        for number, cell in zip(componentNumbers, componentCells):
+            constraints.setdefault(number, []).append(index[cell])
+        componentNeed = [int(need[number]) for number in constraints]
+        constraintCells = list(constraints.values())
+        k = ids[0] // area
+        if len(ids) >= DP_MIN_CELLS and predicted_states(len(ids), componentNeed, constraintCells) > exactLimit:
+            sampler = ComponentSampler(len(ids), componentNeed, constraintCells, rng)
+            samplers.append((k, len(components[k]), sampler))
+            components[k].append((ids, None))
+            approximate[k] = True
+            continue
+        counted, tallies, _ = solve_component(len(ids), tuple(componentNeed), tuple(tuple(c) for c in constraintCells))
+        components[k].append((ids, (counted, tallies)))
+    if samplers:
+        sample_until([sampler for _, _, sampler in samplers], start + budget)
+        for k, n, sampler in samplers:
+            components[k][n] = (components[k][n][0], sampler.pooled())
+
+    # Probabilities, combined board by board
+    probability = np.full(K * area, np.nan)
+    valid = np.zeros(K, dtype=bool)
+    arrangements = [0] * K
+    unknownFlat = unknown.reshape(K, area)
+    for k in range(0, K):
+        summaries = [summary for _, summary in components[k]]
+        if broken[k]:
+            continue
+        combs, cellWeights, unborderedWeight = combine_components(summaries, int(unbordered[k]), int(remaining[k]))
+        if combs == 0:
+            continue
+        if not approximate[k]:
+            arrangements[k] = count_total(summaries, int(unbordered[k]), int(remaining[k]))
+        valid[k] = True
+        board = probability[k * area:(k + 1) * area]
+        board[unknownFlat[k]] = unborderedWeight / combs
+        for (ids, _), weights in zip(components[k], cellWeights):
+            probability[ids] = [w / combs for w in weights]
+    probability = probability.reshape(K, sizeX, sizeY)
+
+    # Exact counts settle cells too, sampled estimates never do
+    exact = (valid & ~approximate)[:, None, None]
+    certainMines = forcedMines | (exact & unknown & (probability == 1))
+    certainSafe = forcedSafe | (exact & unknown & (probability == 0))
+    probability[known] = 1.0
+    probability[forcedSafe] = 0.0
+    probability[certainMines] = 1.0
+    probability[~valid] = np.nan
+
+    # A certain safe cell if there is one, otherwise the covered cell least
+    # likely a mine, frontier cells and cells with few neighbours first
+    neighbourCount = np.broadcast_to(neighbourhood_sum(np.ones((sizeX, sizeY), dtype=bool)), (K, sizeX, sizeY))
+    candidates = (unknown | forcedSafe) & valid[:, None, None]
+    key = np.where(candidates, np.where(certainSafe, -1.0, probability), np.inf).reshape(K, area)
+    flatOrder = np.lexsort((neighbourCount.reshape(K, area), ~frontier.reshape(K, area), key), axis=-1)
+    move = flatOrder[:, 0]
+    move[~candidates.reshape(K, area).any(axis=1)] = -1
+
+    return {
+        "probability": probability,
+        "mines": certainMines,
+        "safe": certainSafe,
+        "frontier": frontier,
+        "move": move,
+        "approximate": approximate,
+        "valid": valid,
+        "arrangements": arrangements,
+    }
@@ -0,0 +1,72 @@
+# File: renderer.py
+# Draws the board on a single Canvas. Every cell is one image item, created
+# once and reused by every game after it. Changed cells are only collected;
+# they are drawn together at most FPS times a second, so a solver revealing
+# hundreds of tiles a move does not redraw them one by one.
+
+from tkinter import Canvas
+import time
+
+
+FPS = 30
+
+
+class BoardRenderer:
+
+    def __init__(self, master, sizeX, sizeY, images, fps=FPS):
+        self.sizeX = sizeX
+        self.sizeY = sizeY
+        self.images = images
+        self.cell = images["plain"].width()
+        self.frameTime = 1.0 / fps
+        self.canvas = Canvas(master, width = sizeY * self.cell, height = sizeX * self.cell, highlightthickness = 0)
+
+        self.items = []
+        for x in range(0, sizeX):
+            for y in range(0, sizeY):
+                self.items.append(self.canvas.create_image(y * self.cell, x * self.cell, image = images["plain"], anchor = "nw"))
+        self.marks = [] # outlines drawn over cells, cleared by reset
+        self.dirty = {} # cell index -> image to draw
+        self.pending = False # a flush is scheduled
+        self.lastFlush = 0.0
+
+    # Index of the cell under a canvas position, None outside the board
+    def cellAt(self, px, py):
+        x = py // self.cell
+        y = px // self.cell
+        if 0 <= x < self.sizeX and 0 <= y < self.sizeY:
+            return x * self.sizeY + y
+        return None
+
+    # Show image on cell i with the next frame
+    def draw(self, i, image):
+        self.dirty[i] = image
+        if not self.pending:
+            self.pending = True
+            delay = max(0.0, self.frameTime - (time.perf_counter() - self.lastFlush))
+            self.canvas.after(int(delay * 1000), self.flush)
+
+    def flush(self):
+        self.pending = False
+        for i, image in self.dirty.items():
+            self.canvas.itemconfig(self.items[i], image = image)
+        self.dirty.clear()
+        self.lastFlush = time.perf_counter()
+
+    # Whether a frame is due, for callers that draw from outside the event loop
+    def frameDue(self):
+        return time.perf_counter() - self.lastFlush >= self.frameTime
+
+    # Outline cell i, e.g. the mine that ended the game
+    def mark(self, i, colour):
+        x, y = divmod(i, self.sizeY)
+        self.marks.append(self.canvas.create_rectangle(y * self.cell, x * self.cell, (y + 1) * self.cell - 1, (x + 1) * self.cell - 1, outline = colour, width = 2))
+
+    # Every cell covered again, for the next game
+    def reset(self):
+        for mark in self.marks:
+            self.canvas.delete(mark)
+        self.marks = []
+        for i in range(0, len(self.items)):
+            self.dirty[i] = self.images["plain"]
+        self.flush()
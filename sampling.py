@@ -0,0 +1,134 @@
+# File: sampling.py
+# Approximate counts for frontier components too large to count exactly.
+#
+# Arrangements are drawn by sequential importance sampling: the cells of a
+# component are decided one at a time in boundary_order, and whenever both
+# mine and safe keep every number tile satisfiable one is drawn at random, a
+# mine with probability p. The sample is weighted by 1/p or 1/(1 - p) for every
+# such draw, so every valid arrangement has expected weight 1, and summed
+# weights estimate the counts and tallies of count_arrangements up to a common
+# factor, which cancels out in every probability. Weights are turned into
+# integers, so the estimates go through combine_components like exact counts.
+#
+# Samples are dealt into BATCHES batches. Working the probabilities out once per
+# batch gives the spread of the estimate, and so its confidence interval.
+
+import math
+import time
+
+from frontier import boundary_order
+
+
+# Components the counting DP would need more states than this for are sampled
+# instead, for at most SAMPLE_BUDGET seconds a move
+EXACT_LIMIT = 200000
+SAMPLE_BUDGET = 0.5
+
+BATCHES = 10
+MIN_SAMPLES = 2 * BATCHES # per component, even when the deadline has passed
+WEIGHT_SCALE = 2 ** 32 # weights are kept as integers at this scale
+MAX_LOG_WEIGHT = 600.0 # relative weights are capped below the float range
+Z95 = 1.96 # normal quantile of a 95% confidence interval
+
+
+# One arrangement as (mine cells, log of its weight), or None at a dead end
+def sample_arrangement(need, order, cellConstraints, cellsLeft, rng):
+    placed = [0] * len(need)
+    left = list(cellsLeft)
+    mines = []
+    logWeight = 0.0
+    for i in order:
+        constraints = cellConstraints[i]
+        for c in constraints:
+            left[c] -= 1
+        canMine = all(placed[c] < need[c] for c in constraints)
+        canSafe = all(need[c] - placed[c] <= left[c] for c in constraints)
+        if canMine and canSafe:
+            # as likely a mine as the number tiles around it still need on average
+            p = sum((need[c] - placed[c]) / (left[c] + 1) for c in constraints) / len(constraints)
+            mine = rng.random() < p
+            logWeight -= math.log(p if mine else 1 - p)
+        elif canMine or canSafe:
+            mine = canMine
+        else:
+            return None
+        if mine:
+            for c in constraints:
+                placed[c] += 1
+            mines.append(i)
+    return mines, logWeight
+
+
+class ComponentSampler:
+
+    def __init__(self, size, need, constraintCells, rng):
+        self.size = size
+        self.need = need
+        self.order = boundary_order(size, constraintCells)
+        self.cellConstraints = [[] for _ in range(size)]
+        for c, cells in enumerate(constraintCells):
+            for i in cells:
+                self.cellConstraints[i].append(c)
+        self.cellsLeft = [len(cells) for cells in constraintCells]
+        self.rng = rng
+        self.samples = 0
+        self.logScale = None # log weight of the first sample, all weights are relative to it
+        # weighted counts and tallies, one pair per batch
+        self.batches = [({}, [{} for _ in range(size)]) for _ in range(BATCHES)]
+
+    def sample(self):
+        counts, tallies = self.batches[self.samples % BATCHES]
+        self.samples += 1
+        drawn = sample_arrangement(self.need, self.order, self.cellConstraints, self.cellsLeft, self.rng)
+        if drawn is None:
+            return
+        mines, logWeight = drawn
+        if self.logScale is None:
+            self.logScale = logWeight
+        k = len(mines)
+        weight = round(math.exp(min(logWeight - self.logScale, MAX_LOG_WEIGHT)) * WEIGHT_SCALE)
+        counts[k] = counts.get(k, 0) + weight
+        for i in mines:
+            tallies[i][k] = tallies[i].get(k, 0) + weight
+
+    # All batches together, the estimate to use
+    def pooled(self):
+        return merge_summaries(self.batches)
+
+
+def merge_summaries(summaries):
+    counts = {}
+    tallies = None
+    for batchCounts, batchTallies in summaries:
+        for k, n in batchCounts.items():
+            counts[k] = counts.get(k, 0) + n
+        if tallies is None:
+            tallies = [dict(tally) for tally in batchTallies]
+            continue
+        for tally, batchTally in zip(tallies, batchTallies):
+            for k, n in batchTally.items():
+                tally[k] = tally.get(k, 0) + n
+    return counts, tallies
+
+
+# Sample every component in turn until the deadline (a time.perf_counter()
+# value), taking at least MIN_SAMPLES from each. Returns the total samples.
+def sample_until(samplers, deadline):
+    total = 0
+    while samplers:
+        for sampler in samplers:
+            sampler.sample()
+        total += len(samplers)
+        if total >= MIN_SAMPLES * len(samplers) and time.perf_counter() >= deadline:
+            break
+    return total
+
+
+# Mean and half width of the 95% confidence interval of the per-batch estimates
+def interval(values):
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, Z95 * (variance / n) ** 0.5
@@ -0,0 +1,361 @@
+# File: server.py
+# The solver as a local service. Board states come in as JSON, the mine
+# probability of every cell and the move the solver would make go back out.
+#
+#   python server.py                      JSON lines on stdin, one answer per line on stdout
+#   python server.py --http 8080          POST /solve on http://127.0.0.1:8080
+#
+# A request gives the board as the player sees it, either cell by cell
+#   {"id": 1, "sizeX": 16, "sizeY": 30, "mines": 99,
+#    "revealed": [[x, y, number], ...], "flagged": [[x, y], ...]}
+# or as one string per row, a digit for a revealed cell, F for a flag, . for a covered cell
+#   {"id": 1, "mines": 99, "rows": ["..1F..", ...]}
+# and gets back
+#   {"id": 1, "probabilities": [[p or null, ...], ...], "mines": [[x, y], ...], "safe": [[x, y], ...],
+#    "move": {"x": x, "y": y, "probability": p, "certain": bool}, "approximate": bool}
+# probabilities 0 .. 1 per row, null for revealed cells, or {"id": 1, "error": "..."}.
+# Boards have at most MAX_CELLS cells. "budget" in a request sets the seconds
+# components too large to count are sampled for, at most MAX_BUDGET.
+# Answers on stdin/stdout come back as they are ready, not in request order.
+#
+# Requests are queued and handed to a pool of worker processes in batches of up
+# to --batch, so a burst of requests costs one round trip to a worker per batch.
+# A new batch is only taken once a worker is free, and requests arriving in the
+# meantime are batched together.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from multiboard import solve_boards
+from sampling import SAMPLE_BUDGET
+from sweep import neighbourhood_sum
+
+
+BATCH_SIZE = 32 # requests per batch at most
+BATCH_WAIT = 0.002 # seconds a batch waits for more requests to join it
+MAX_BODY = 1 << 24 # bytes of an HTTP request body
+MAX_CELLS = 1 << 16 # cells of a board, e.g. 256x256
+MAX_BUDGET = 2.0 # seconds a request may ask to sample for
+
+
+### Solving, in the worker processes
+
+# JSON true and false are Python bools, which are ints too
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# (sizeX, sizeY, mines, numbers, flagged) of a request, numbers a dict cell -> number
+def parse_request(request):
+    if not isinstance(request, dict):
+        raise ValueError("a request is a JSON object")
+    if "rows" in request:
+        rows = request["rows"]
+        if not rows or not all(isinstance(row, str) and len(row) == len(rows[0]) for row in rows):
+            raise ValueError("rows must be strings of the same length")
+        sizeX, sizeY = len(rows), len(rows[0])
+    else:
+        sizeX, sizeY = request.get("sizeX"), request.get("sizeY")
+        if not is_int(sizeX) or not is_int(sizeY) or sizeX < 1 or sizeY < 1:
+            raise ValueError("sizeX and sizeY must be positive integers")
+    if sizeX * sizeY > MAX_CELLS:
+        raise ValueError("a %dx%d board is larger than the %d cells served" % (sizeX, sizeY, MAX_CELLS))
+    if "rows" in request:
+        revealed, flagged = [], []
+        for x, row in enumerate(rows):
+            for y, c in enumerate(row):
+                if c.isdigit():
+                    revealed.append((x, y, int(c)))
+                elif c == "F":
+                    flagged.append((x, y))
+                elif c != ".":
+                    raise ValueError("unknown cell %r at %d, %d" % (c, x, y))
+    else:
+        revealed = request.get("revealed", [])
+        flagged = request.get("flagged", [])
+    mines = request.get("mines")
+    if not is_int(mines):
+        raise ValueError("mines must be an integer")
+
+    def cell(x, y):
+        if not is_int(x) or not is_int(y) or not (0 <= x < sizeX and 0 <= y < sizeY):
+            raise ValueError("no cell %r, %r on a %dx%d board" % (x, y, sizeX, sizeY))
+        return x * sizeY + y
+
+    numbers = {}
+    try:
+        for x, y, number in revealed:
+            if not is_int(number) or not 0 <= number <= 8:
+                raise ValueError("%r is not a number of a cell" % (number,))
+            numbers[cell(x, y)] = number
+        flags = [cell(x, y) for x, y in flagged]
+    except TypeError:
+        raise ValueError("revealed cells are [x, y, number], flagged cells [x, y]")
+    if any(i in numbers for i in flags):
+        raise ValueError("a cell cannot be both revealed and flagged")
+    return sizeX, sizeY, mines, numbers, flags
+
+
+# Mine probabilities and the recommended move of one request, from
+# multiboard.solve_boards on a stack of one board
+def analyse(request):
+    sizeX, sizeY, mines, numbers, flagged = parse_request(request)
+    if mines < 0 or mines >= sizeX * sizeY:
+        raise ValueError("a %dx%d board cannot hold %d mines" % (sizeX, sizeY, mines))
+    budget = request.get("budget", SAMPLE_BUDGET)
+    # JSON lets NaN and Infinity through, and a NaN deadline never passes
+    if isinstance(budget, bool) or not isinstance(budget, (int, float)) or not math.isfinite(budget):
+        raise ValueError("budget must be a finite number of seconds")
+    budget = min(max(budget, 0.0), MAX_BUDGET)
+    revealed = np.zeros(sizeX * sizeY, dtype=bool)
+    revealed[list(numbers)] = True
+    counts = np.zeros(sizeX * sizeY, dtype=np.uint8)
+    counts[list(numbers)] = list(numbers.values())
+    flags = np.zeros(sizeX * sizeY, dtype=bool)
+    flags[flagged] = True
+    revealed, counts, flags = (a.reshape(1, sizeX, sizeY) for a in (revealed, counts, flags))
+
+    # A number with more flags around it than it shows, or not enough covered cells left to reach it
+    missing = counts.astype(np.int16) - neighbourhood_sum(flags)
+    unmet = revealed & ((missing < 0) | (missing > neighbourhood_sum(~(revealed | flags))))
+    if unmet.any():
+        raise ValueError("the number at %d, %d cannot be met" % tuple(np.argwhere(unmet[0])[0]))
+
+    results = solve_boards(revealed, flags, counts, mines, budget=budget)
+    if not results["valid"][0]:
+        raise ValueError("no arrangement of %d mines fits this board" % mines)
+    probability = results["probability"][0]
+    safe = results["safe"][0]
+
+    def coords(cells):
+        return [[int(x), int(y)] for x, y in np.argwhere(cells)]
+
+    response = {
+        "id": request.get("id"),
+        "probabilities": [[None if p != p else float(p) for p in row] for row in probability.tolist()],
+        "mines": coords(results["mines"][0]),
+        "safe": coords(safe),
+        "move": None,
+        "approximate": bool(results["approximate"][0]),
+    }
+    move = int(results["move"][0])
+    if move >= 0:
+        x, y = divmod(move, sizeY)
+        response["move"] = {"x": x, "y": y, "probability": float(probability[x, y]), "certain": bool(safe[x, y])}
+    return response
+
+
+# Answers to a batch of requests, an error answer for every request that could not be solved
+def analyse_batch(requests):
+    responses = []
+    for request in requests:
+        requestId = request.get("id") if isinstance(request, dict) else None
+        try:
+            responses.append(analyse(request))
+        except ValueError as error:
+            responses.append({"id": requestId, "error": str(error)})
+        except Exception as error:
+            # one request the solver fails on does not take the rest of its batch down
+            responses.append({"id": requestId, "error": "solver failed: %s" % error})
+    return responses
+
+
+### The service
+
+class SolverService:
+
+    # workers processes solve the batches, 0 solves them in a thread of this process
+    def __init__(self, workers=None, batchSize=BATCH_SIZE, batchWait=BATCH_WAIT):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.batchSize = batchSize
+        self.batchWait = batchWait
+        self.pool = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(max(self.workers, 1))
+        self.batcher = asyncio.get_running_loop().create_task(self.batches())
+
+    async def close(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    # The answer to one request
+    async def solve(self, request):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    # Take requests off the queue in batches, one batch per free worker
+    async def batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batchWait
+            while len(batch) < self.batchSize:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            loop.create_task(self.dispatch(batch))
+
+    async def dispatch(self, batch):
+        try:
+            responses = await asyncio.get_running_loop().run_in_executor(self.pool, analyse_batch, [request for request, _ in batch])
+        except Exception as error:
+            responses = [{"id": request.get("id") if isinstance(request, dict) else None, "error": "solver failed: %s" % error} for request, _ in batch]
+        finally:
+            self.slots.release()
+        for (_, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+
+### JSON lines on stdin and stdout
+
+async def serve_stdio(service):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_BODY)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    pending = set()
+
+    async def answer(line):
+        try:
+            response = await service.solve(json.loads(line))
+        except ValueError as error:
+            response = {"id": None, "error": "invalid JSON: %s" % error}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.strip():
+            task = loop.create_task(answer(line))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+
+
+### HTTP
+
+STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+async def write_response(writer, status, body, keepAlive):
+    data = json.dumps(body).encode()
+    writer.write(("HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n" % (
+        status, STATUS[status], len(data), "keep-alive" if keepAlive else "close")).encode() + data)
+    await writer.drain()
+
+
+# POST /solve with one request, or a list of them for a list of answers.
+# Connections are kept alive unless the client asks otherwise.
+async def handle_http(service, reader, writer):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            parts = line.decode("latin-1").split()
+            if len(parts) != 3:
+                await write_response(writer, 400, {"error": "bad request line"}, False)
+                break
+            method, path, version = parts
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keepAlive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+            length = headers.get("content-length", "0") or "0"
+            if not length.isdigit():
+                await write_response(writer, 400, {"error": "invalid Content-Length"}, False)
+                break
+            length = int(length)
+            if length > MAX_BODY:
+                await write_response(writer, 413, {"error": "request body too large"}, False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            if path != "/solve":
+                await write_response(writer, 404, {"error": "not found, POST /solve"}, keepAlive)
+            elif method != "POST":
+                await write_response(writer, 405, {"error": "POST /solve"}, keepAlive)
+            else:
+                try:
+                    request = json.loads(body)
+                except ValueError as error:
+                    await write_response(writer, 400, {"error": "invalid JSON: %s" % error}, keepAlive)
+                else:
+                    if isinstance(request, list):
+                        response = list(await asyncio.gather(*(service.solve(r) for r in request)))
+                    else:
+                        response = await service.solve(request)
+                    await write_response(writer, 200, response, keepAlive)
+            if not keepAlive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_http(service, host, port):
+    server = await asyncio.start_server(lambda reader, writer: handle_http(service, reader, writer), host, port)
+    sys.stderr.write("solver listening on http://%s:%d/solve\n" % (host, port))
+    async with server:
+        await server.serve_forever()
+
+
+async def serve(args):
+    service = SolverService(args.workers, args.batch, args.wait)
+    await service.start()
+    try:
+        if args.http is not None:
+            await serve_http(service, args.host, args.http)
+        else:
+            await serve_stdio(service)
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mine probabilities and moves for board states")
+    parser.add_argument("--http", type=int, default=None, metavar="PORT", help="serve HTTP on this port instead of stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1", help="address to serve HTTP on")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU, 0 for none)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="requests per batch at most")
+    parser.add_argument("--wait", type=float, default=BATCH_WAIT, help="seconds a batch waits for more requests")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
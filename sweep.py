@@ -0,0 +1,81 @@
+# File: sweep.py
+# Vectorised Rule A / Rule B. Instead of looking at the neighbours of one
+# exposed tile at a time, the covered and flagged neighbours of every tile
+# are counted at once with a 3x3 neighbourhood sum over NumPy arrays.
+# Sparse boards use forced_cells_sparse instead.
+
+import numpy as np
+
+
+# Bitboard mask as a (sizeX, sizeY) boolean array
+def mask_to_array(mask, sizeX, sizeY):
+    size = sizeX * sizeY
+    raw = np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:size].reshape(sizeX, sizeY).astype(bool)
+
+
+# Boolean array as a bitboard mask, the other way round
+def array_to_mask(a):
+    return int.from_bytes(np.packbits(a.reshape(-1), bitorder="little").tobytes(), "little")
+
+
+# For every cell, the sum of its 8 neighbours (cells off the board count as 0).
+# The 3x3 box sum is separable, so it is a sum along rows then along columns.
+# Works on a stack of boards too, the board is made of the last two axes.
+def neighbourhood_sum(a):
+    a = a.astype(np.int8)
+    rows = a.copy()
+    rows[..., 1:, :] += a[..., :-1, :]
+    rows[..., :-1, :] += a[..., 1:, :]
+    box = rows.copy()
+    box[..., 1:] += rows[..., :-1]
+    box[..., :-1] += rows[..., 1:]
+    return box - a
+
+
+# Cells forced by one pass of both rules over the whole board, as flat
+# bitboard indices (mines, safe).
+def forced_cells(board):
+    sizeX, sizeY = board.sizeX, board.sizeY
+    revealed = mask_to_array(board.revealed, sizeX, sizeY)
+    flagged = mask_to_array(board.flagged, sizeX, sizeY)
+    counts = np.frombuffer(bytes(board.counts), dtype=np.uint8).reshape(sizeX, sizeY)
+    mines, safe = forced_arrays(revealed, flagged, counts)
+    return np.flatnonzero(mines).tolist(), np.flatnonzero(safe).tolist()
+
+
+# One pass of both rules as boolean arrays (mines, safe), on one board or on a
+# stack of them. Cells in knownSafe (shaped like flagged) are already known to
+# be safe without being revealed, so they count as neither unknown nor mines.
+# Rule A: a revealed number with as many covered neighbours as missing mines makes them all mines.
+# Rule B: a revealed tile with as many flags around it as its number makes the rest of its neighbours safe.
+def forced_arrays(revealed, flagged, counts, knownSafe=None):
+    unknown = ~(revealed | flagged)
+    if knownSafe is not None:
+        unknown &= ~knownSafe
+    counts = counts.astype(np.int8)
+
+    unknownAround = neighbourhood_sum(unknown)
+    flaggedAround = neighbourhood_sum(flagged)
+
+    ruleA = revealed & (unknownAround > 0) & (unknownAround == counts - flaggedAround)
+    ruleB = revealed & (unknownAround > 0) & (flaggedAround == counts)
+
+    mines = unknown & (neighbourhood_sum(ruleA) > 0)
+    safe = unknown & (neighbourhood_sum(ruleB) > 0) & ~mines
+    return mines, safe
+
+
+# Same as forced_cells for boards too large to turn into arrays. Only exposed
+# cells next to the frontier can force anything, so only those are looked at.
+def forced_cells_sparse(board):
+    mines = set()
+    safe = set()
+    for i in board.activeCells():
+        unknown = board.unknownNeighbours(i)
+        missing = board.count(i) - board.flaggedCount(i)
+        if missing == len(unknown):
+            mines.update(unknown)
+        elif missing == 0:
+            safe.update(unknown)
+    return sorted(mines), sorted(safe - mines)
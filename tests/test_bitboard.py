@@ -0,0 +1,35 @@
+# Opening a zero region in one step (Bitboard.openRegion) against the cell by
+# cell cascade it replaces, on the same board with its regions dropped. Flags
+# are put on numbered cells and mines first, some of them on the rim of the
+# regions that get opened, which the solver itself never does.
+
+import random
+
+from engine import MinesweeperEngine
+
+
+def state(game):
+    board = game.board
+    borders = tuple(tile["isBorder"] for tile in game.tileMap.values() if tile["state"] == 0)
+    return (board.revealed, board.flagged, board.frontier, board.exposed, board.unbordered, game.clickedCount, borders)
+
+
+def test_open_region_with_flags():
+    for seed in range(0, 200):
+        rng = random.Random(seed)
+        bulk = MinesweeperEngine(seed, 30, 30, 90)
+        cascade = MinesweeperEngine(seed, 30, 30, 90)
+        cascade.board.regions = None
+        numbered = [i for i in range(0, 900) if bulk.board.count(i) or bulk.board.isMine(i)]
+        zeros = [i for i in range(0, 900) if not bulk.board.count(i) and not bulk.board.isMine(i)]
+        for i in rng.sample(numbered, 12):
+            bulk.flagTile(bulk.tileAt(i))
+            cascade.flagTile(cascade.tileAt(i))
+        for i in rng.sample(zeros, min(5, len(zeros))):
+            if bulk.tileAt(i)["state"] == 0:
+                bulk.onClick(bulk.tileAt(i))
+                cascade.onClick(cascade.tileAt(i))
+                assert state(bulk) == state(cascade), (seed, i)
+        board = bulk.board
+        for i in board.frontierCells():
+            assert any(board.isRevealed(j) for j in board.neighbours(i))
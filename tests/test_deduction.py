@@ -0,0 +1,54 @@
+# deduce against brute force: every cell it calls a mine must be a mine, and
+# every cell it calls safe must be safe, in every assignment of mines that
+# meets all the constraints. It does not have to find every certain cell.
+
+import random
+from itertools import product
+
+from deduction import deduce
+
+
+# A random system of (cells, mines) constraints over up to 10 cells, with the
+# mines of a hidden assignment so it always has a solution
+def random_system(rng):
+    size = rng.randint(1, 10)
+    cellIds = rng.sample(range(0, 1000), size)
+    hidden = {i for i in cellIds if rng.random() < 0.3}
+    constraints = []
+    for _ in range(rng.randint(1, size + 2)):
+        cells = frozenset(rng.sample(cellIds, rng.randint(1, min(size, 8))))
+        constraints.append((cells, sum(1 for i in cells if i in hidden)))
+    return cellIds, constraints
+
+
+# Cells that are mines in every solution, and cells that are safe in every solution
+def certain_cells(cellIds, constraints):
+    alwaysMine = set(cellIds)
+    alwaysSafe = set(cellIds)
+    for values in product((0, 1), repeat=len(cellIds)):
+        assignment = dict(zip(cellIds, values))
+        if all(sum(assignment[i] for i in cells) == n for cells, n in constraints):
+            alwaysMine &= {i for i in cellIds if assignment[i]}
+            alwaysSafe &= {i for i in cellIds if not assignment[i]}
+    return alwaysMine, alwaysSafe
+
+
+def test_random_systems():
+    rng = random.Random(1)
+    found = 0
+    for _ in range(4000):
+        cellIds, constraints = random_system(rng)
+        mines, safe = deduce(constraints)
+        alwaysMine, alwaysSafe = certain_cells(cellIds, constraints)
+        assert set(mines) <= alwaysMine
+        assert set(safe) <= alwaysSafe
+        assert not set(mines) & set(safe)
+        found += len(mines) + len(safe)
+    assert found > 0
+
+
+# The 1-2 pattern along a wall: 1 over cells a b, 2 over a b c settles c as a mine
+def test_one_two():
+    mines, safe = deduce([(frozenset([1, 2]), 1), (frozenset([1, 2, 3]), 2)])
+    assert mines == [3]
+    assert safe == []
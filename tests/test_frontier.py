@@ -0,0 +1,70 @@
+# count_arrangements_dp against the backtracking it replaces on large
+# components: both must give the same arrangement counts per mine count and
+# the same per-cell tallies, on random constraint systems and on the frontier
+# components of seeded games.
+
+import random
+
+from engine import MinesweeperEngine
+from frontier import count_arrangements, count_arrangements_dp, find_components, predicted_states
+
+
+def assert_same(size, need, constraintCells):
+    counts, tallies = count_arrangements(size, need, constraintCells)
+    stats = {}
+    dpCounts, dpTallies = count_arrangements_dp(size, need, constraintCells, stats)
+    assert dpCounts == counts
+    assert dpTallies == tallies
+    assert stats["states"] <= predicted_states(size, need, constraintCells)
+
+
+# A random system: number tiles touching random cells, needing the mines of a
+# hidden arrangement so most systems have solutions, or a random need so some don't
+def random_system(rng):
+    size = rng.randint(1, 14)
+    hidden = {i for i in range(size) if rng.random() < 0.3}
+    need, constraintCells = [], []
+    for _ in range(rng.randint(1, size + 2)):
+        cells = rng.sample(range(size), rng.randint(1, min(size, 8)))
+        constraintCells.append(cells)
+        need.append(sum(1 for i in cells if i in hidden) if rng.random() < 0.8 else rng.randint(0, len(cells)))
+    for i in range(size):
+        if not any(i in cells for cells in constraintCells):
+            constraintCells[rng.randrange(len(constraintCells))].append(i)
+    return size, need, constraintCells
+
+
+def test_random_systems():
+    rng = random.Random(1)
+    for _ in range(3000):
+        assert_same(*random_system(rng))
+
+
+# Strips along a row of number tiles, the shape the DP is for
+def test_strips():
+    rng = random.Random(2)
+    for length in range(1, 16):
+        cells = 2 * length + 2
+        constraintCells = [[2 * c, 2 * c + 1, 2 * c + 2, 2 * c + 3] for c in range(length)]
+        for _ in range(5):
+            hidden = {i for i in range(cells) if rng.random() < 0.3}
+            need = [sum(1 for i in around if i in hidden) for around in constraintCells]
+            assert_same(cells, need, constraintCells)
+
+
+def test_game_components():
+    checked = 0
+    for seed in range(0, 40):
+        game = MinesweeperEngine(seed)
+        steps = game.solveSteps()
+        for step in steps:
+            if step["type"] != "probabilities":
+                continue
+            exposed = [game.tileAt(i) for i in game.board.activeCells()]
+            for component in find_components(exposed, step["tiles"]):
+                if len(component) > 20:
+                    continue # too many arrangements to enumerate quickly
+                need, constraintCells = game.component_constraints(component)
+                assert_same(len(component), need, constraintCells)
+                checked += 1
+    assert checked > 100